@@ -8,11 +8,13 @@ import numpy
 import util
 import yaml
 from unmix.source.api import prediction
+from unmix.source.data import audio_backend
+from unmix.source.data import stft_backend
 from helperutils.boolean_argparse import str2bool
 
 
 def load_audio(file, sample_rate, mono):
-    audio, _ = librosa.load(file, sr=sample_rate, mono=mono)
+    audio, _ = audio_backend.load(file, sample_rate, mono=mono)
     real_mono = not isinstance(audio[0], numpy.ndarray)
     if real_mono:
         return [audio], audio.shape[0]
@@ -21,7 +23,7 @@ def load_audio(file, sample_rate, mono):
 
 
 def generate_stft(audio, fft_length):
-    return [librosa.stft(a, fft_length) for a in audio]
+    return list(stft_backend.stft(audio, fft_length))
 
 
 parser = argparse.ArgumentParser(description='evaluate a training')
@@ -76,7 +78,7 @@ for training_folder in args.training_folders:
 
             for sources in zip(instrument_stft, rest_stft, predicted_instrument, predicted_rest):
                 (sdr, sir, sar, perm) = mir_eval.separation.bss_eval_sources(
-                    numpy.array([librosa.istft(sources[0]), librosa.istft(sources[1])]),
+                    stft_backend.istft(sources[:2]),
                     numpy.array([sources[2], sources[3]]),
                     compute_permutation=False
                 )
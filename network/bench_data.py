@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Measures the throughput of the training data pipeline without a model.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import numpy as np
+import psutil
+from multiprocessing.pool import ThreadPool
+
+import preprocess
+from unmix.source.configuration import Configuration
+from unmix.source.data import batchitem
+from unmix.source.data import spectrogram_cache
+from unmix.source.data.datagenerator import DataGenerator
+from unmix.source.data.dataloader import DataLoader
+from unmix.source.logging.logger import Logger
+from unmix.source.pipeline.transformers.transformerfactory import TransformerFactory
+
+
+BACKEND_NONE = 'none'
+BACKEND_CACHE = 'cache'
+BACKEND_STORE = 'store'
+PASS_COLD = 'cold'  # Empty song caches and spectrogram cache, not run for the store which is written beforehand
+PASS_PERSISTED = 'persisted'  # Empty song caches, spectrograms cached by the cold pass or stored beforehand
+PASS_WARM = 'warm'  # Songs held by the song caches
+PASSES = [PASS_COLD, PASS_PERSISTED, PASS_WARM]
+
+
+class Engine(object):
+    'Stands in for the engine of the data generator, no tests are run.'
+    test_songs = None
+
+
+def overrides(workers, precision, backend, folder):
+    """
+    Returns the configuration of a mode, spectrogram cache and store are written to `folder`.
+    """
+    return {
+        'training': {'data': {'workers': workers, 'mode': 'thread'}},
+        'spectrogram_generation': {
+            'precision': precision,
+            'cache': {'enabled': backend == BACKEND_CACHE, 'folder': os.path.join(folder, 'spectrograms')},
+            'store': {'enabled': backend == BACKEND_STORE, 'folder': os.path.join(folder, 'store')}
+        }
+    }
+
+
+def reset_song_caches():
+    batchitem.cache = None
+    if batchitem.shared_cache is not None:
+        batchitem.shared_cache.close()
+    batchitem.shared_cache = None
+
+
+def populate_store(songs):
+    'Writes the spectrograms of `songs` to the store as preprocess.py does, returns the seconds taken.'
+    start = time.perf_counter()
+    for folder, status, message in map(preprocess.preprocess_song, songs):
+        if message:
+            Logger.warn("Song '%s' %s: %s" % (folder, status, message))
+    return time.perf_counter() - start
+
+
+def bytes_read():
+    'Bytes read by the process, including memory mapped spectrograms of the cache.'
+    counters = psutil.Process().io_counters()
+    return getattr(counters, 'read_chars', counters.read_bytes) + spectrogram_cache.statistics['bytes_read']
+
+
+def cache_statistics():
+    caches = [batchitem.song_cache(), batchitem.shared_song_cache()]
+    statistics = [cache.statistics() for cache in caches if cache is not None]
+    return sum(s['hits'] for s in statistics), sum(s['misses'] for s in statistics)
+
+
+def measure(generator, batches, workers):
+    """
+    Generates `batches` batches with `workers` threads, returns the windows per second, MB per second read,
+    the song cache hit rate and the 50th and 95th percentile of the batch latencies in milliseconds.
+    """
+    def generate(i):
+        start = time.perf_counter()
+        x, _ = generator[i]
+        return len(x), time.perf_counter() - start
+
+    hits, misses = cache_statistics()
+    read = bytes_read()
+    start = time.perf_counter()
+    with ThreadPool(workers) as pool:
+        results = pool.map(generate, range(batches))
+    seconds = time.perf_counter() - start
+    hits, misses = [after - before for after, before in zip(cache_statistics(), (hits, misses))]
+    latencies = np.array([latency for _, latency in results]) * 1000
+    return (sum(windows for windows, _ in results) / seconds, (bytes_read() - read) / 1e6 / seconds,
+            100.0 * hits / max(1, hits + misses), np.percentile(latencies, 50), np.percentile(latencies, 95))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the training data pipeline of a configuration.")
+    parser.add_argument('--configuration', default='', type=str, help="Configuration defining collection and transformer.")
+    parser.add_argument('--workingdir', default=os.getcwd(), type=str,
+                        help="Working directory (default: current directory).")
+    parser.add_argument('--batches', default=100, type=int, help="Batches to generate per mode and pass.")
+    parser.add_argument('--songs', default=0, type=int, help="Limit of training songs (default: all).")
+    parser.add_argument('--workers', default=[1], type=int, nargs='*', help="Worker threads to compare.")
+    parser.add_argument('--precisions', default=['single'], nargs='*', help="Precisions to compare (single, double).")
+    parser.add_argument('--backends', default=[BACKEND_NONE, BACKEND_CACHE, BACKEND_STORE], nargs='*',
+                        help="Spectrogram backends to compare (none: decode, cache: spectrogram cache, store: HDF5 store).")
+
+    args = parser.parse_args()
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for number, (backend, precision, workers) in enumerate(
+                itertools.product(args.backends, args.precisions, args.workers)):
+            # Every mode starts with empty song caches, spectrogram cache and store
+            mode_folder = os.path.join(folder, str(number))
+            Configuration.initialize(args.configuration, args.workingdir, False,
+                                     overrides=overrides(workers, precision, backend, mode_folder))
+            Logger.initialize(False)
+            reset_song_caches()
+            songs, _, _ = DataLoader.load()
+            if args.songs > 0:
+                songs = songs[:args.songs]
+            generator = DataGenerator('benchmark', Engine(), songs, TransformerFactory.build())
+            batches = min(args.batches, len(generator))
+            if not batches:
+                Logger.error("No batches to benchmark.")
+                exit(1)
+            passes = PASSES
+            if backend == BACKEND_STORE:
+                Logger.info("Stored %d songs in %.1f [s]." % (len(songs), populate_store(songs)))
+                passes = [name for name in PASSES if name != PASS_COLD]
+            for name in passes:
+                if name == PASS_PERSISTED:
+                    reset_song_caches()
+                results.append(('%s %s %d worker(s) %s' % (backend, precision, workers, name),
+                                measure(generator, batches, workers)))
+
+    Logger.info("%-40s %10s %10s %9s %9s %9s" % ('mode', 'windows/s', 'MB/s read', 'hit rate', 'p50 [ms]', 'p95 [ms]'))
+    for mode, (windows, mb, hit_rate, p50, p95) in results:
+        Logger.info("%-40s %10.1f %10.1f %8.1f%% %9.2f %9.2f" % (mode, windows, mb, hit_rate, p50, p95))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Compares decode and resample times of the audio backend with librosa for the songs of a collection.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import argparse
+import os
+import time
+import librosa
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import audio_backend
+from unmix.source.data.dataloader import DataLoader
+from unmix.source.data.song import Song
+from unmix.source.logging.logger import Logger
+
+
+def measure(load, files):
+    """
+    Returns the seconds per file and the loaded audio of the first file, which is loaded once before measuring.
+    """
+    first, _ = load(files[0])
+    start = time.time()
+    for file in files:
+        load(file)
+    return (time.time() - start) / len(files), first
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks decoding and resampling the songs of a collection.")
+    parser.add_argument('--configuration', default='', type=str, help="Configuration defining the collection.")
+    parser.add_argument('--workingdir', default=os.getcwd(), type=str,
+                        help="Working directory (default: current directory).")
+    parser.add_argument('--songs', default=10, type=int, help="Number of songs to load.")
+    parser.add_argument('--sample_rate', default=0, type=int,
+                        help="Target sample rate (default: sample rate of the collection).")
+    parser.add_argument('--resamplers', default=[audio_backend.RESAMPLER_POLY, audio_backend.RESAMPLER_DEFAULT],
+                        nargs='*', help="Resamplers of the backend to compare (poly or librosa resamplers).")
+
+    args = parser.parse_args()
+    Configuration.initialize(args.configuration, args.workingdir, False)
+    Logger.initialize(False)
+
+    sample_rate = args.sample_rate or Configuration.get('collection.sample_rate', default=44100)
+    mono = not Configuration.get('collection.stereo', default=False)
+    files = []
+    for folder in DataLoader.loadFiles(Configuration.get('collection.folder', optional=False))[:args.songs]:
+        files.extend(Song.find_files(folder))
+    if not files:
+        Logger.error("No songs to benchmark.")
+        exit(1)
+
+    baseline, reference = measure(lambda file: librosa.load(file, sr=sample_rate, mono=mono), files)
+    Logger.info("%d files at %d Hz, librosa.load: %.3f s per file." % (len(files), sample_rate, baseline))
+    for resampler in args.resamplers:
+        seconds, audio = measure(lambda file: audio_backend.load(file, sample_rate, mono=mono, quality=resampler),
+                                 files)
+        length = min(reference.shape[-1], audio.shape[-1])
+        error = np.max(np.abs(reference[..., :length] - audio[..., :length]))
+        Logger.info("%s: %.3f s per file (%.1fx), max difference to librosa %.2e." % (
+            resampler, seconds, baseline / max(seconds, 1e-9), error))
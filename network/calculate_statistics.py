@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Calculates the statistics files of the zmuv normalizer for a collection.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+import progressbar
+
+from unmix.source.configuration import Configuration
+from unmix.source.data.dataloader import DataLoader
+from unmix.source.data.song import Song
+from unmix.source.data.spectrogram_generator import generate_spectrogram
+from unmix.source.exceptions.dataerror import DataError
+from unmix.source.helpers import statisticshelper
+from unmix.source.logging.logger import Logger
+from unmix.source.pipeline.normalizers import normalizer_zmuv
+
+
+def initialize_worker(configuration, workingdir):
+    Configuration.initialize(configuration, workingdir, False)
+
+
+def song_state(folder):
+    state = []
+    for file in Song.find_files(folder):
+        stat = os.stat(file)
+        state.extend([stat.st_mtime_ns, stat.st_size])
+    return state
+
+
+def song_statistics(folder):
+    """
+    Returns the partial statistics of the mix and instrument magnitudes of a song, one song is loaded at a time.
+    """
+    try:
+        instrument_file, rest_file = Song.find_files(folder)
+        instrument = generate_spectrogram(instrument_file)['spectrograms']
+        rest = generate_spectrogram(rest_file)['spectrograms']
+        channels = 2 if Configuration.get('collection.stereo', default=False) else 1
+        if min(len(instrument), len(rest)) < channels:
+            raise DataError(folder, 'mono song in a stereo collection')
+        width = min(instrument[0].shape[1], rest[0].shape[1])
+        mix = np.abs([i[:, :width] + r[:, :width] for i, r in zip(instrument, rest)])
+        instrument = np.abs([channel[:, :width] for channel in instrument[:len(mix)]])
+        return folder, (statisticshelper.calculate(mix), statisticshelper.calculate(instrument)), ''
+    except Exception as e:
+        return folder, None, str(e)
+
+
+def load_state(file):
+    """
+    Returns the partial statistics per song of a previous run.
+    """
+    if not os.path.exists(file):
+        return {}
+    try:
+        data = np.load(file)
+        return {folder: (list(state), [(count, mean, m2) for count, mean, m2 in
+                                       zip(data['count'][i], data['mean'][i], data['m2'][i])])
+                for i, (folder, state) in enumerate(zip(data['folders'], data['states']))}
+    except Exception as e:
+        Logger.warn("Ignore invalid statistics state '%s': %s" % (file, str(e)))
+        return {}
+
+
+def save_state(file, songs):
+    folders = sorted(songs)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    temp_file = '%s.%d.tmp.npz' % (file, os.getpid())
+    np.savez(temp_file,
+             folders=np.array(folders, dtype=str),
+             states=np.array([songs[folder][0] for folder in folders], dtype=np.int64),
+             count=np.array([[track[0] for track in songs[folder][1]] for folder in folders], dtype=np.int64),
+             mean=np.array([[track[1] for track in songs[folder][1]] for folder in folders]),
+             m2=np.array([[track[2] for track in songs[folder][1]] for folder in folders]))
+    os.replace(temp_file, file)
+
+
+def write_statistics(file, statistics, count):
+    result = statisticshelper.finalize(statistics)
+    result['songs'] = count
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    temp_file = '%s.%d.tmp' % (file, os.getpid())
+    with open(temp_file, 'w') as f:
+        json.dump(result, f)
+    os.replace(temp_file, file)
+    Logger.info("Wrote statistics of %d songs to %s (mean %.4f, variance %.4f)." % (
+        count, file, result['mean'], result['variance']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Calculates mean and variance of mix and instrument magnitudes for the zmuv normalizer.")
+    parser.add_argument('--configuration', default='', type=str,
+                        help="Training configuration defining collection, spectrogram settings and statistics files.")
+    parser.add_argument('--workingdir', default=os.getcwd(), type=str,
+                        help="Working directory (default: current directory).")
+    parser.add_argument('--workers', default=os.cpu_count(), type=int,
+                        help="Number of worker processes (default: number of cores).")
+    parser.add_argument('--force', action='store_true',
+                        help="Recalculate songs which are unchanged since the last run.")
+
+    args = parser.parse_args()
+    start = time.time()
+
+    Configuration.initialize(args.configuration, args.workingdir, False)
+    Logger.initialize(False)
+    Logger.info("Arguments: ", str(args))
+
+    mix_file = normalizer_zmuv.path(Configuration.get('transformation.normalizers.zmuv.mix_file', optional=False))
+    vocals_file = normalizer_zmuv.path(Configuration.get('transformation.normalizers.zmuv.vocals_file',
+                                                         optional=False))
+    state_file = os.path.splitext(mix_file)[0] + '.songs.npz'
+
+    folders = Configuration.get('collection.folders')
+    if folders:
+        paths = [folder['path'] for folder in folders]
+    else:
+        paths = [Configuration.get('collection.folder', optional=False)]
+    files = []
+    for path in paths:
+        files.extend(DataLoader.loadFiles(path, ignore_song_limit=True))
+
+    # Songs are only calculated again if they are new or changed, removed songs are dropped
+    previous = {} if args.force else load_state(state_file)
+    songs = {}
+    missing = []
+    for folder in files:
+        try:
+            state = song_state(folder)
+        except DataError as e:
+            Logger.warn("Skip song '%s': %s" % (folder, str(e)))
+            continue
+        if folder in previous and previous[folder][0] == state:
+            songs[folder] = previous[folder]
+        else:
+            missing.append((folder, state))
+    Logger.info("Found %d songs, %d to calculate." % (len(songs) + len(missing), len(missing)))
+
+    states = dict(missing)
+    failed = 0
+    with multiprocessing.Pool(args.workers, initialize_worker, (args.configuration, args.workingdir)) as pool:
+        with progressbar.ProgressBar(max_value=len(missing)) as progbar:
+            for i, (folder, statistics, message) in enumerate(
+                    pool.imap_unordered(song_statistics, [folder for folder, _ in missing])):
+                if statistics is None:
+                    failed += 1
+                    Logger.warn("Song '%s' failed: %s" % (folder, message))
+                else:
+                    songs[folder] = (states[folder], statistics)
+                progbar.update(i + 1)
+    if not songs:
+        Logger.error("No songs to calculate statistics.")
+        exit(1)
+
+    mix = vocals = (0, 0.0, 0.0)
+    for _, (mix_statistics, vocals_statistics) in songs.values():
+        mix = statisticshelper.merge(mix, mix_statistics)
+        vocals = statisticshelper.merge(vocals, vocals_statistics)
+    save_state(state_file, songs)
+    write_statistics(mix_file, mix, len(songs))
+    write_statistics(vocals_file, vocals, len(songs))
+
+    Logger.info("Calculated songs: %d, failed: %d." % (len(missing) - failed, failed))
+    end = time.time()
+    Logger.info("Finished processing in %d [s]." % (end - start))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Preprocesses a collection into the chunked spectrogram store used for training.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import argparse
+import multiprocessing
+import os
+import time
+import progressbar
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import spectrogram_store
+from unmix.source.data.dataloader import DataLoader
+from unmix.source.data.song import Song
+from unmix.source.exceptions.dataerror import DataError
+from unmix.source.logging.logger import Logger
+
+
+def initialize_worker(configuration, workingdir):
+    Configuration.initialize(configuration, workingdir, False)
+
+
+def preprocess_song(folder, force=False):
+    try:
+        instrument_file, rest_file = Song.find_files(folder)
+    except DataError as e:
+        return folder, 'skipped', str(e)
+    try:
+        if not force and spectrogram_store.contains(folder, instrument_file, rest_file):
+            return folder, 'existing', ''
+        spectrogram_store.write(folder, instrument_file, rest_file)
+        return folder, 'written', ''
+    except Exception as e:
+        return folder, 'failed', str(e)
+
+
+def preprocess_song_forced(folder):
+    return preprocess_song(folder, True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Preprocesses a collection into the chunked spectrogram store.")
+    parser.add_argument('--configuration', default='', type=str,
+                        help="Training configuration defining collection and spectrogram settings.")
+    parser.add_argument('--workingdir', default=os.getcwd(), type=str,
+                        help="Working directory (default: current directory).")
+    parser.add_argument('--workers', default=os.cpu_count(), type=int,
+                        help="Number of worker processes (default: number of cores).")
+    parser.add_argument('--force', action='store_true',
+                        help="Regenerate songs which are already stored.")
+
+    args = parser.parse_args()
+    start = time.time()
+
+    Configuration.initialize(args.configuration, args.workingdir, False)
+    Logger.initialize(False)
+    Logger.info("Arguments: ", str(args))
+    Logger.info("Store: %s" % spectrogram_store.folder())
+
+    folders = Configuration.get('collection.folders')
+    if folders:
+        paths = [folder['path'] for folder in folders]
+    else:
+        paths = [Configuration.get('collection.folder', optional=False)]
+    files = []
+    for path in paths:
+        files.extend(DataLoader.loadFiles(path, ignore_song_limit=True))
+    Logger.info("Found %d songs to preprocess." % len(files))
+
+    results = {'written': 0, 'existing': 0, 'skipped': 0, 'failed': 0}
+    worker = preprocess_song_forced if args.force else preprocess_song
+    with multiprocessing.Pool(args.workers, initialize_worker, (args.configuration, args.workingdir)) as pool:
+        with progressbar.ProgressBar(max_value=len(files)) as progbar:
+            for i, (folder, status, message) in enumerate(pool.imap_unordered(worker, files)):
+                results[status] += 1
+                if message:
+                    Logger.warn("Song '%s' %s: %s" % (folder, status, message))
+                progbar.update(i + 1)
+
+    Logger.info("Preprocessed songs: %d written, %d already stored, %d skipped, %d failed." % (
+        results['written'], results['existing'], results['skipped'], results['failed']))
+    end = time.time()
+    Logger.info("Finished processing in %d [s]." % (end - start))
@@ -1,8 +1,8 @@
 from unmix.source.prediction.fileprediction import MixPrediction
 from unmix.source.engine import Engine
 from unmix.source.configuration import Configuration
+from unmix.source.data import stft_backend
 
-import librosa
 import numpy
 import os
 import tensorflow as tf
@@ -10,9 +10,9 @@ import tensorflow as tf
 
 def inverse_stft(prediction, stereo):
     if stereo:
-        return [librosa.istft(channel) for channel in prediction]
+        return list(stft_backend.istft(prediction))
     else:
-        return [librosa.istft(prediction[0])]
+        return [stft_backend.istft(prediction[0])]
 
 
 def create_engine(working_directory):
@@ -28,7 +28,7 @@ class Configuration(object):
     output_directory = ''
 
     @staticmethod
-    def initialize(configuration_file, working_directory=None, create_output=True, disable_merge=False):
+    def initialize(configuration_file, working_directory=None, create_output=True, disable_merge=False, overrides=None):
         Configuration.output_directory = ''
 
         global configuration
@@ -40,6 +40,9 @@ class Configuration(object):
             configuration_file = converter.env('UNMIX_CONFIGURATION_FILE')
         configuration_dict = Configuration.load_merged_configuration(
             configuration_file, disable_merge)
+        if overrides:
+            # Nested values replacing the loaded configuration (e.g. to compare settings in one process)
+            configuration_dict = dictionary.merge(overrides, configuration_dict)
         configuration = dictionary.to_named_tuple(configuration_dict)
 
         if create_output:
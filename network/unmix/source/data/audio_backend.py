@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Decodes and resamples audio files for training and prediction.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import math
+import time
+import librosa
+import numpy as np
+import scipy.signal
+import soundfile
+
+from unmix.source.configuration import Configuration
+from unmix.source.logging.logger import Logger
+
+
+BACKEND_SOUNDFILE = 'soundfile'
+BACKEND_LIBROSA = 'librosa'
+RESAMPLER_POLY = 'poly'
+RESAMPLER_DEFAULT = 'soxr_hq'
+
+statistics = {
+    'files': 0,
+    'resampled': 0,
+    'decode_seconds': 0.0,
+    'resample_seconds': 0.0
+}
+
+
+def resampler():
+    return Configuration.get('spectrogram_generation.audio.resampler', default=RESAMPLER_DEFAULT)
+
+
+def decode(file, mono, dtype=np.float32, block_frames=0):
+    """
+    Decodes a file with soundfile as (channels, samples), mono is the mean of the channels like in librosa.
+    Blocks of `block_frames` are read into one contiguous array, otherwise the file is read at once and channels are
+    views on the interleaved samples.
+    """
+    dtype = np.dtype(dtype).name
+    with soundfile.SoundFile(file) as f:
+        sample_rate = f.samplerate
+        if block_frames <= 0:
+            audio = f.read(dtype=dtype, always_2d=True)
+            return (np.mean(audio, axis=1)[np.newaxis] if mono else audio.T), sample_rate
+        audio = np.empty((1 if mono else f.channels, f.frames), dtype=dtype)
+        position = 0
+        for block in f.blocks(blocksize=block_frames, dtype=dtype, always_2d=True):
+            block = block[:audio.shape[1] - position]
+            end = position + len(block)
+            if mono:
+                np.mean(block, axis=1, out=audio[0, position:end])
+            else:
+                audio[:, position:end] = block.T
+            position = end
+    return audio[:, :position], sample_rate
+
+
+def resample(audio, source_rate, target_rate, quality=RESAMPLER_DEFAULT):
+    """
+    Resamples along the last axis, `poly` is the polyphase filter of scipy, other qualities are librosa resamplers
+    (e.g. soxr_hq, soxr_vhq, kaiser_best).
+    """
+    if source_rate == target_rate:
+        return audio
+    if quality == RESAMPLER_POLY:
+        divisor = math.gcd(int(source_rate), int(target_rate))
+        return scipy.signal.resample_poly(audio, target_rate // divisor, source_rate // divisor,
+                                          axis=-1).astype(audio.dtype, copy=False)
+    return librosa.resample(audio, orig_sr=source_rate, target_sr=target_rate, res_type=quality)
+
+
+def load(file, sample_rate=None, mono=True, dtype=np.float32, quality=None):
+    """
+    Returns the audio in the format of `librosa.load` (samples of mono files, otherwise (channels, samples)) and the
+    sample rate. Files are only resampled if the rate differs from `sample_rate` (None keeps the rate of the file),
+    with the configured resampler unless `quality` is given.
+    """
+    backend = Configuration.get('spectrogram_generation.audio.backend', default=BACKEND_SOUNDFILE)
+    start = time.time()
+    audio = None
+    if backend == BACKEND_SOUNDFILE:
+        try:
+            audio, source_rate = decode(file, mono, dtype,
+                                        Configuration.get('spectrogram_generation.audio.block_frames', default=0))
+        except (RuntimeError, TypeError) as e:
+            Logger.debug("Decode '%s' with librosa: %s" % (file, str(e)))
+    if audio is None:
+        audio, source_rate = librosa.load(file, sr=None, mono=mono, dtype=dtype)
+    decoded = time.time()
+    audio = resample(audio, source_rate, source_rate if sample_rate is None else sample_rate,
+                     resampler() if quality is None else quality)
+    statistics['files'] += 1
+    statistics['decode_seconds'] += decoded - start
+    if sample_rate is not None and source_rate != sample_rate:
+        statistics['resampled'] += 1
+        statistics['resample_seconds'] += time.time() - decoded
+    if audio.ndim > 1 and audio.shape[0] == 1:
+        audio = audio[0]
+    return audio, source_rate if sample_rate is None else sample_rate
+
+
+def log_statistics(name=''):
+    if not statistics['files']:
+        return
+    Logger.debug("%s audio: %d files decoded in %.2f s, %d resampled in %.2f s (%.3f s per file)." % (
+        name, statistics['files'], statistics['decode_seconds'], statistics['resampled'],
+        statistics['resample_seconds'],
+        (statistics['decode_seconds'] + statistics['resample_seconds']) / statistics['files']))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Reads spectrogram frame ranges of songs by decoding only the samples covering the frames.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import librosa
+import numpy as np
+import soundfile
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import stft_backend
+from unmix.source.data.song import Song
+from unmix.source.exceptions.dataerror import DataError
+
+
+class AudioRange(object):
+    """
+    Computes frames of the centered STFT of an audio file from partial reads, identical to the full STFT.
+    """
+
+    def __init__(self, file, fft_length, sample_rate, mono):
+        info = soundfile.info(file)
+        if info.samplerate != sample_rate:
+            raise DataError(file, 'sample rate %d requires resampling to %d' % (info.samplerate, sample_rate))
+        self.file = file
+        self.fft_length = fft_length
+        self.hop_length = fft_length // 4
+        self.frames = info.frames
+        self.mono = mono or info.channels == 1
+        self.channels = 1 if self.mono else 2
+        self.height = fft_length // 2 + 1
+        self.width = 1 + self.frames // self.hop_length
+        self.last = None
+
+    def read(self, start, end):
+        """
+        Returns the frames [start, end) clipped to the spectrogram width as (channels, height, frames).
+        """
+        start = max(0, start)
+        end = min(self.width, end)
+        last = self.last
+        if last is not None and last[0] == (start, end):
+            return last[1]
+        if end <= start:
+            return np.zeros((self.channels, self.height, 0), dtype=np.complex64)
+
+        half = self.fft_length // 2
+        first_sample = start * self.hop_length - half
+        last_sample = (end - 1) * self.hop_length - half + self.fft_length
+        read_start = max(0, first_sample)
+        read_end = min(self.frames, last_sample)
+        pad_left = half if first_sample < 0 else 0
+        pad_right = half if last_sample > self.frames else 0
+        # Reflection padding needs the samples next to the borders
+        if pad_left:
+            read_end = max(read_end, min(self.frames, half + 1))
+        if pad_right:
+            read_start = min(read_start, max(0, self.frames - half - 1))
+
+        audio, _ = soundfile.read(self.file, start=read_start, stop=read_end, dtype='float32', always_2d=True)
+        audio = audio.T
+        if self.mono:
+            audio = librosa.to_mono(audio)[np.newaxis]
+        else:
+            audio = audio[:2]
+        audio = np.pad(audio, ((0, 0), (pad_left, pad_right)), mode=stft_backend.PAD_MODE)
+        offset = first_sample - (read_start - pad_left)
+        audio = audio[:, offset:offset + (end - start - 1) * self.hop_length + self.fft_length]
+
+        spectrograms = stft_backend.stft(audio, self.fft_length, center=False)
+        self.last = ((start, end), spectrograms)
+        return spectrograms
+
+
+class RangeChannel(object):
+    """
+    Channel of a spectrogram which only computes the sliced frames, summing all sources (e.g. for the mix).
+    """
+
+    def __init__(self, sources, channel, width):
+        self.sources = sources
+        self.channel = channel
+        self.shape = (sources[0].height, width)
+        self.ndim = 2
+
+    def __getitem__(self, key):
+        rows, columns = key
+        start, stop, _ = columns.indices(self.shape[1])
+        data = self.sources[0].read(start, stop)[self.channel]
+        for source in self.sources[1:]:
+            data = data + source.read(start, stop)[self.channel]
+        return data[rows]
+
+    def __array__(self, dtype=None):
+        return np.asarray(self[:, :], dtype=dtype)
+
+
+def load(folder):
+    """
+    Returns mix and instrument channels of a song which decode frames only when sliced.
+    """
+    instrument_file, rest_file = Song.find_files(folder)
+    mono = not Configuration.get('collection.stereo', default=False)
+    sample_rate = Configuration.get('collection.sample_rate', default=44100)
+    fft_length = Configuration.get('spectrogram_generation.fft_length', default=1536)
+    instrument = AudioRange(instrument_file, fft_length, sample_rate, mono)
+    rest = AudioRange(rest_file, fft_length, sample_rate, mono)
+    width = min(instrument.width, rest.width)
+    channels = min(instrument.channels, rest.channels)
+    mix = [RangeChannel([instrument, rest], channel, width) for channel in range(channels)]
+    instrument = [RangeChannel([instrument], channel, width) for channel in range(channels)]
+    return mix, instrument
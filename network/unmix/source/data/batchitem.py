@@ -8,14 +8,80 @@ Batch item with song and chop offset.
 __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
+import os
+import time
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import audiorange
+from unmix.source.data import sharedsongcache
+from unmix.source.data import songfeatures
 from unmix.source.data.song import Song
+from unmix.source.data.songcache import SongCache, POLICY_LRU
+from unmix.source.exceptions.dataerror import DataError
+
+
+LOADER_SONG = 'song'
+LOADER_RANGE = 'audio_range'
+
+cache = None
+shared_cache = None
+
+
+def song_cache():
+    global cache
+    if cache is None:
+        cache = SongCache(Configuration.get('training.cache.max_bytes', default=2000000000),
+                          Configuration.get('training.cache.max_items', default=1000),
+                          Configuration.get('training.cache.policy', default=POLICY_LRU))
+    return cache
+
+
+def shared_song_cache():
+    """
+    Returns the cache shared by data loading processes if `training.cache.shared`, must be called before forking.
+    """
+    global shared_cache
+    if shared_cache is None and Configuration.get('training.cache.shared', default=False):
+        shared_cache = sharedsongcache.SharedSongCache(
+            Configuration.get('training.cache.max_bytes', default=2000000000),
+            max_attached=Configuration.get('training.cache.max_attached', default=8))
+    return shared_cache
+
+
+def reset_after_fork():
+    """
+    Forked data loading processes start with an empty song cache, locks and open HDF5 files of the parent are unsafe.
+    """
+    global cache
+    cache = None
+
 
-from cachetools import LRUCache, cached
+os.register_at_fork(after_in_child=reset_after_fork)
 
 
-@cached(cache=LRUCache(maxsize=5))
 def load_song(file):
-    return Song(file).load()
+    song = song_cache().get(file)
+    if song is not None:
+        return song
+    shared = shared_song_cache()
+    if shared is not None:
+        song = shared.get(file)
+        if song is not None:
+            return song
+    start = time.time()
+    if Configuration.get('training.data.loader', default=LOADER_SONG) == LOADER_RANGE:
+        try:
+            song = audiorange.load(file)
+        except DataError:
+            pass  # Songs requiring resampling are decoded completely
+    if song is None:
+        song = Song(file).load(windowed=True)
+    song = songfeatures.precompute(song, songfeatures.configured())
+    if shared is not None and sharedsongcache.is_shareable(song):
+        # Every process maps the published copy, lazily read songs stay in the cache of the process
+        return shared.put(file, song)
+    song_cache().put(file, song, time.time() - start)
+    return song
 
 
 class BatchItem(object):
@@ -8,93 +8,232 @@ Loads and handels training and validation data collections.
 __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
+import itertools
 import keras
 import numpy as np
+import os
 
 from unmix.source.configuration import Configuration
-from unmix.source.data.batchitem import BatchItem
-from unmix.source.data.song import Song
+from unmix.source.data import audio_backend
+from unmix.source.data import spectrogram_cache
+from unmix.source.data import windowindex
+from unmix.source.data import batchitem
+from unmix.source.data import remix
+from unmix.source.data.songindex import SongIndex
 from unmix.source.logging.logger import Logger
 
 
-def limit_items_of_song(items, limit):
-    fft_scaling_factor = 1536 / Configuration.get('spectrogram_generation.fft_length', default=1536)
-    limit *= fft_scaling_factor
-    middle = len(items) / 2
-    limit_half = limit / 2
-    start = int(max(0, middle - limit_half))
-    end = int(min(len(items), start + limit))
-    return items[start:end]
+SAMPLER_WINDOW = 'window'
+SAMPLER_SONG_POOL = 'song_pool'
+SAMPLER_INFINITE = 'infinite'
+MODE_THREAD = 'thread'
+MODE_PROCESS = 'process'
 
 
 class DataGenerator(keras.utils.Sequence):
     """Generates data for Keras"""
 
     index = None
+    seed = 0
 
-    def __init__(self, name, engine, collection, transformer, accuracy=None):
+    def __init__(self, name, engine, collection, transformer, accuracy=None, augment=False, steps=0):
         self.name = name
         self.collection = collection
+        self.files = set(collection)
+        self.names = [os.path.basename(file) for file in collection]
         self.transformer = transformer
         self.batch_size = Configuration.get('training.batch_size', default=8)
         self.epoch_shuffle = Configuration.get('training.epoch.shuffle')
+        self.sampler = Configuration.get('training.epoch.sampler', default=SAMPLER_WINDOW)
+        self.pool_size = Configuration.get('training.epoch.pool_size', default=5)
+        # Batches of randomly drawn windows per epoch, the infinite sampler without steps runs full passes
+        self.steps = steps if self.sampler == SAMPLER_INFINITE else 0
+        self.augment = augment
+        self.remix_probability = remix.probability() if augment else 0.0
+        self.remix_gain_db = remix.gain_db()
+        self.remixes = 0
+        self.cache_statistics = batchitem.song_cache().statistics()
+        shared = batchitem.shared_song_cache()
+        self.shared_cache_statistics = shared.statistics() if shared is not None else None
         self.engine = engine
         self.accuracy = accuracy
         self.count = 0
+        # Read by Keras to run __getitem__ in parallel threads or forked processes
+        self.workers = Configuration.get('training.data.workers', default=1)
+        self.use_multiprocessing = Configuration.get('training.data.mode', default=MODE_THREAD) == MODE_PROCESS
+        self.max_queue_size = Configuration.get('training.data.max_queue_size', default=10)
+        # Batches handed out are still queued by Keras, buffers are reused after all queued batches are consumed
+        self.buffers = [None] * (self.max_queue_size + self.workers + 2)
+        self.buffer_counter = itertools.count()
+        SongIndex.build(self.collection)
+        if self.steps > 0:
+            counts, limit_items_per_song = self.window_counts()
+            self.starts, self.offsets = windowindex.offsets(counts, limit_items_per_song)
         self.on_epoch_end()
 
-    def generate_index(self):
-        self.index = np.array([])
-        for file in self.collection:
-            try:
-                song = Song(file)
-                items = [BatchItem(file, i, song.name) for i in range(self.transformer.calculate_items(song.width))]
-
-                if self.transformer.shuffle:
-                    np.random.shuffle(items)
-
-                # limit number of items per song if configured
-                limit_items_per_song = Configuration.get('training.limit_items_per_song', default=0)
-                if limit_items_per_song > 0:
-                    items = limit_items_of_song(items, limit_items_per_song)
-
-                self.index = np.append(self.index, items)
-            except Exception as e:
+    def __getstate__(self):
+        # Workers only generate batches, engine and accuracy (with the model) stay in the training process
+        state = self.__dict__.copy()
+        state['engine'] = None
+        state['accuracy'] = None
+        state['buffers'] = [None] * len(self.buffers)
+        state['buffer_counter'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.buffer_counter = itertools.count()
+
+    def window_counts(self):
+        """Returns the number of windows of every song and the configured limit of windows per song"""
+        counts = np.zeros(len(self.collection), dtype=np.int64)
+        for song, file in enumerate(self.collection):
+            entry = SongIndex.get(file)
+            if entry['broken']:
                 if self.count == 0:
-                    Logger.warn("Skip file while generating index: %s" % str(e.args))
+                    Logger.warn("Skip file while generating index: %s" % entry['error'])
+                continue
+            counts[song] = self.transformer.calculate_items(entry['width'])
+
+        # limit number of items per song if configured
+        limit_items_per_song = Configuration.get('training.limit_items_per_song', default=0)
+        if limit_items_per_song > 0:
+            limit_items_per_song *= 1536 / Configuration.get('spectrogram_generation.fft_length', default=1536)
+        return counts, limit_items_per_song
+
+    def generate_index(self):
+        counts, limit_items_per_song = self.window_counts()
+        self.index = windowindex.build(counts, self.transformer.shuffle, limit_items_per_song)
 
     def __len__(self):
         """Denotes the number of batches per epoch"""
+        if self.steps > 0:
+            return self.steps if self.offsets[-1] else 0
         return len(self.index) // self.batch_size
 
     def __getitem__(self, i):
         """Generate one batch of data"""
-        subset = self.index[i * self.batch_size:(i + 1) * self.batch_size]
-        x, y = self.__data_generation(subset)
+        # Every batch draws from its own generator, so parallel (forked) workers draw different windows and remixes
+        random = np.random.default_rng([self.seed, i])
+        x, y = self.__data_generation(self.subset(i, random), random)
         return x, y
 
+    def subset(self, i, random=None):
+        """Returns the windows of batch `i`"""
+        if self.steps > 0:
+            return windowindex.sample(self.starts, self.offsets, self.batch_size,
+                                      np.random.default_rng([self.seed, i]) if random is None else random)
+        return self.index[i * self.batch_size:(i + 1) * self.batch_size]
+
     def on_epoch_end(self):
         """Updates index after each epoch"""
+        if self.steps <= 0:
+            self.generate_index()
+            if self.epoch_shuffle:
+                if self.sampler == SAMPLER_SONG_POOL:
+                    self.index = windowindex.shuffle_in_pools(self.index, self.pool_size)
+                else:
+                    np.random.shuffle(self.index)
+        self.end_epoch()
+
+    def end_epoch(self):
+        """Logs statistics, draws the seed of the next epoch and evaluates the accuracy, keeps the index"""
         Logger.debug("%s epoch %d ended." % (self.name, self.count))
-        self.generate_index()
-        if self.epoch_shuffle:
-            np.random.shuffle(self.index)
+        spectrogram_cache.log_statistics(self.name)
+        audio_backend.log_statistics(self.name)
+        self.log_cache_statistics()
+        if self.remixes:
+            Logger.debug("%s remixed %d songs of batches." % (self.name, self.remixes))
+            self.remixes = 0
+        # Generators which are not augmented (validation) keep the windows of the first epoch comparable
+        if self.augment or self.count == 0:
+            self.seed = np.random.randint(2 ** 31)
         test_frequency = Configuration.get('collection.test_frequency', default=0)
         if self.engine.test_songs and self.accuracy and \
                 test_frequency > 0 and self.count % test_frequency == 0:
             self.accuracy.evaluate(self.count)
         self.count += 1
 
-    def __data_generation(self, subset):
-        """Generates data containing batch_size samples"""
-        x = []
-        y = []
-
-        for item in subset:
-            if item is not None:
-                rest, instrument = item.load()
-                rest, instrument = self.transformer.run(item.name, rest, instrument, item.index)
-                x.append(rest)
-                y.append(instrument)
-
-        return np.array(x), np.array(y)
+    def log_cache_statistics(self):
+        statistics = batchitem.song_cache().statistics()
+        self.__log_cache_statistics('song cache', statistics, self.cache_statistics)
+        self.cache_statistics = statistics
+        shared = batchitem.shared_song_cache()
+        if shared is not None:
+            statistics = shared.statistics()
+            self.__log_cache_statistics('shared song cache', statistics, self.shared_cache_statistics)
+            self.shared_cache_statistics = statistics
+
+    def __log_cache_statistics(self, cache, statistics, previous):
+        hits = statistics['hits'] - previous['hits']
+        misses = statistics['misses'] - previous['misses']
+        evictions = statistics['evictions'] - previous['evictions']
+        if hits + misses > 0:
+            Logger.debug("%s %s: %d hits, %d misses (hit rate %.1f%%), %d evictions, %d songs with %.1f MB resident." % (
+                self.name, cache, hits, misses, 100.0 * hits / (hits + misses), evictions,
+                statistics['items'], statistics['resident_bytes'] / 1e6))
+
+    def __data_generation(self, subset, random):
+        """Generates data containing batch_size samples into preallocated float32 buffers"""
+        slot = next(self.buffer_counter) % len(self.buffers)
+        buffers = self.buffers[slot]
+        if buffers is not None and len(buffers[0]) != len(subset):
+            buffers = None
+        songs = subset['song']
+        loaded = {}
+        for song in np.unique(songs):
+            positions = np.flatnonzero(songs == song)
+            windows = subset['window'][positions]
+            (rest, instrument), windows = self.__load(song, windows, loaded, random)
+            if buffers is None:
+                x, y = self.transformer.run_batch(self.names[song], rest, instrument, windows)
+                buffers = (np.empty((len(subset),) + x.shape[1:], dtype=np.float32),
+                           np.empty((len(subset),) + y.shape[1:], dtype=np.float32))
+                self.buffers[slot] = buffers
+                buffers[0][positions], buffers[1][positions] = x, y
+            elif positions[-1] - positions[0] == len(positions) - 1:
+                # Consecutive windows of a song are transformed directly into the batch
+                batch = slice(positions[0], positions[-1] + 1)
+                self.transformer.run_batch(self.names[song], rest, instrument, windows,
+                                           buffers[0][batch], buffers[1][batch])
+            else:
+                buffers[0][positions], buffers[1][positions] = self.transformer.run_batch(
+                    self.names[song], rest, instrument, windows)
+        return buffers
+
+    def __load(self, song, windows, loaded, random):
+        """
+        Loads a song and randomly remixes its windows if augmented, returns the channels and the windows to transform.
+        Songs loaded for the same batch are collected in `loaded` as remix partners.
+        """
+        channels = batchitem.load_song(self.collection[song])
+        if self.remix_probability > 0:
+            partner = self.__remix_partner(song, loaded, random) if random.random() < self.remix_probability else None
+            loaded[song] = channels
+            if partner is not None:
+                self.remixes += 1
+                return remix.augment(channels, partner, windows, self.transformer.step, self.transformer.size,
+                                     self.remix_gain_db, random)
+        return channels, windows
+
+    def __remix_partner(self, song, loaded, random):
+        """
+        Returns another song of the collection which is resident, cached by this process or loaded for the same
+        batch. Partners are never decoded or transformed.
+        """
+        cache = batchitem.song_cache()
+        candidates = [file for file in cache.keys() if file in self.files and file != self.collection[song]]
+        if candidates:
+            partner = cache.peek(candidates[random.integers(len(candidates))])
+            if partner is not None:
+                return partner
+        candidates = [other for other in loaded if other != song]
+        if not candidates:
+            return None
+        return loaded[candidates[random.integers(len(candidates))]]
+
+    def load_window(self, song, window):
+        """Loads and transforms a single window of a song"""
+        random = np.random.default_rng([self.seed, song, window])
+        (rest, instrument), windows = self.__load(song, np.array([window]), {}, random)
+        return self.transformer.run('%s-%i' % (self.names[song], window), rest, instrument, int(windows[0]))
@@ -8,12 +8,12 @@ Loads and handels training and validation data collections.
 __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
-import hashlib
 import glob
 import os
 import random
 
 from unmix.source.configuration import Configuration
+from unmix.source.data import manifest
 from unmix.source.data.song import Song
 from unmix.source.logging.logger import Logger
 
@@ -54,18 +54,13 @@ class DataLoader(object):
     def loadFiles(path, ignore_song_limit=False):
         if path is None:
             path = Configuration.get_path('collection.folder', False)
-        instrument_filter = os.path.join(path, '**', '%s*.wav' % Song.PREFIX_INSTRUMENT)
-        files_instrument = [os.path.dirname(file) for file in glob.iglob(instrument_filter, recursive=True)]
-        rest_filter = os.path.join(path, '**', '%s*.wav' % Song.PREFIX_REST)
-        files_rest = [os.path.dirname(file) for file in glob.iglob(rest_filter, recursive=True)]
-
-        files = [f for f in files_instrument if f in files_rest]  # make sure both instrument and rest file exists
-        skipped_count = len(set(files_instrument) - set(files_rest)) + len(set(files_rest) - set(files_instrument))
+        if manifest.enabled():
+            # Song folders are listed from the manifest, only changed directories are read again
+            files, skipped_count = manifest.load(path)
+        else:
+            files, skipped_count = DataLoader.globFiles(path)
         Logger.debug(f"Skipped {skipped_count} files (incomplete instrument/rest pair)")
 
-        # Sort files by hash value of folder to guarantee a consistent order
-        files.sort(key=lambda x: hashlib.md5(os.path.basename(x).encode('utf-8', 'surrogatepass')).hexdigest())
-
         song_limit = Configuration.get('collection.song_limit', default=0)
         if not ignore_song_limit and song_limit > 0:
             if song_limit <= 1:  # Configuration as percentage share
@@ -75,6 +70,20 @@ class DataLoader(object):
 
         return files
 
+    @staticmethod
+    def globFiles(path):
+        instrument_filter = os.path.join(path, '**', '%s*.wav' % Song.PREFIX_INSTRUMENT)
+        files_instrument = set(os.path.dirname(file) for file in glob.iglob(instrument_filter, recursive=True))
+        rest_filter = os.path.join(path, '**', '%s*.wav' % Song.PREFIX_REST)
+        files_rest = set(os.path.dirname(file) for file in glob.iglob(rest_filter, recursive=True))
+
+        files = list(files_instrument & files_rest)  # make sure both instrument and rest file exists
+        skipped_count = len(files_instrument ^ files_rest)
+
+        # Sort files by hash value of folder to guarantee a consistent order
+        files.sort(key=lambda x: (manifest.song_order(x), x))
+        return files, skipped_count
+
     @staticmethod
     def splitDataset(files, test_data_count):
         test_files = None
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Persisted manifest of the song folders of a collection, rescanning only changed directories.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import fnmatch
+import hashlib
+import json
+import os
+import time
+
+from unmix.source.configuration import Configuration
+from unmix.source.helpers import filehelper
+from unmix.source.logging.logger import Logger
+
+
+VERSION = 1
+STEMS = {'instrument': 'instrument_*.wav', 'rest': 'rest_*.wav'}
+# Directories changed this shortly before a scan are read again, changes in the same mtime tick could be missed
+UNSETTLED_SECONDS = 2
+
+
+def enabled():
+    return Configuration.get('collection.manifest.enabled', default=True)
+
+
+def path(root):
+    key = hashlib.sha1(os.path.abspath(root).encode('utf-8', 'surrogatepass')).hexdigest()
+    folder = filehelper.build_abspath(Configuration.get('collection.manifest.folder', default='cache/manifests'))
+    return os.path.join(folder, key + '.json')
+
+
+def song_order(folder):
+    'Consistent order of songs by the hash value of the folder name.'
+    return hashlib.md5(os.path.basename(folder).encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def __read_directory(directory, mtime):
+    """
+    Lists the subdirectories and the stems of a directory like the recursive glob of the collection.
+    """
+    entry = {'mtime': mtime, 'directories': [], 'stems': {}}
+    matches = {stem: [] for stem in STEMS}
+    with os.scandir(directory) as entries:
+        for item in entries:
+            if item.name.startswith('.'):
+                continue
+            if item.is_dir():
+                entry['directories'].append(item.name)
+                continue
+            for stem, pattern in STEMS.items():
+                if fnmatch.fnmatchcase(item.name, pattern):
+                    stat = item.stat()
+                    matches[stem].append([item.name, stat.st_size, stat.st_mtime_ns])
+    entry['directories'].sort()
+    for stem, files in matches.items():
+        if files:
+            entry['stems'][stem] = min(files)
+    if len(entry['stems']) == len(STEMS):
+        entry['order'] = song_order(os.path.normpath(directory))
+    return entry
+
+
+def __load(file, root):
+    if not os.path.exists(file):
+        return {}
+    try:
+        with open(file, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == VERSION and manifest.get('root') == os.path.abspath(root):
+            return manifest['directories']
+    except Exception as e:
+        Logger.warn("Ignore invalid manifest '%s': %s" % (file, str(e)))
+    return {}
+
+
+def __save(file, root, directories):
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        temp_file = '%s.%d.tmp' % (file, os.getpid())
+        with open(temp_file, 'w') as f:
+            json.dump({'version': VERSION, 'root': os.path.abspath(root), 'directories': directories}, f)
+        os.replace(temp_file, file)
+    except Exception as e:
+        Logger.warn("Could not write manifest '%s': %s" % (file, str(e)))
+
+
+def scan(root, file):
+    """
+    Updates the manifest `file` of the collection at `root` and returns it as dictionary of directories relative to
+    the root. Every directory is checked by its mtime, only new and changed directories are listed again.
+    """
+    previous = __load(file, root)
+    directories = {}
+    listed = 0
+    now = time.time_ns()
+    pending = ['']
+    while pending:
+        relative = pending.pop()
+        directory = os.path.join(root, relative)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            entry = previous.get(relative)
+            if entry is None or entry['mtime'] is None or entry['mtime'] != mtime:
+                entry = __read_directory(directory, mtime if now - mtime > UNSETTLED_SECONDS * 1e9 else None)
+                listed += 1
+        except OSError as e:
+            Logger.warn("Skip directory '%s': %s" % (directory, str(e)))
+            continue
+        directories[relative] = entry
+        pending.extend(os.path.join(relative, name) for name in entry['directories'])
+    if listed or len(directories) != len(previous):
+        __save(file, root, directories)
+    Logger.debug("Scanned %d directories of '%s', %d new or changed." % (len(directories), root, listed))
+    return directories
+
+
+def songs(root, directories):
+    """
+    Returns the song folders with instrument and rest stem in consistent order and the number of incomplete folders.
+    """
+    folders = []
+    incomplete = 0
+    for relative, entry in directories.items():
+        if 'order' in entry:
+            # Same paths as the glob of the stems
+            folder = os.path.dirname(os.path.join(root, relative, entry['stems']['instrument'][0]))
+            folders.append((entry['order'], folder))
+        elif entry['stems']:
+            incomplete += 1
+    return [folder for _, folder in sorted(folders)], incomplete
+
+
+def load(root):
+    """
+    Returns the ordered song folders of a collection and the number of incomplete folders, using the manifest.
+    Without `collection.manifest.rescan` an existing manifest is used as it is.
+    """
+    file = path(root)
+    if not Configuration.get('collection.manifest.rescan', default=True):
+        directories = __load(file, root)
+        if directories:
+            return songs(root, directories)
+    return songs(root, scan(root, file))
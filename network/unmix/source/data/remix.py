@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Augments training mixes by remixing the instrument of a song with the rest of another loaded song.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import numpy as np
+
+from unmix.source.configuration import Configuration
+
+
+def probability():
+    'Probability to remix the windows of a song in a training batch (`training.augmentation.remix.probability`).'
+    return Configuration.get('training.augmentation.remix.probability', default=0.0)
+
+
+def gain_db():
+    'Range of the random gains of instrument and rest in dB.'
+    return Configuration.get('training.augmentation.remix.gain_db', default=[-6, 6])
+
+
+def frame_range(windows, step, size, width):
+    """
+    Returns the first window and the frames [start, end) covered by the windows of a song with `width` frames.
+    The start is a multiple of `step`, so the windows shifted by the first window chop the same frames.
+    """
+    first = max(0, (step * int(np.min(windows)) - size // 2) // step)
+    end = min(width, step * int(np.max(windows)) - size // 2 + size)
+    return first, first * step, max(first * step, end)
+
+
+def runs(windows, step, size):
+    'Splits the sorted unique windows into runs of overlapping windows.'
+    windows = np.unique(windows)
+    return np.split(windows, np.flatnonzero(np.diff(windows) * step > size) + 1)
+
+
+def read_frames(channel, indices):
+    'Reads the frames `indices` of a channel, lazy channels (store datasets, audio ranges) only read the covered span.'
+    low = int(indices.min())
+    return np.asarray(channel[:, low:int(indices.max()) + 1])[:, indices - low]
+
+
+def remix(song, partner, windows, step, size, gains=(1.0, 1.0), offset=0):
+    """
+    Returns mix and instrument channels of the frames covered by `windows` of `song` with the instrument of `song` and
+    the rest (mix minus instrument) of `partner` from frame `offset`, scaled by the linear `gains` of instrument and
+    rest, and the windows relative to the returned frames. A shorter rest is repeated.
+    Only the frames of runs of overlapping windows are remixed, the runs are concatenated at multiples of `step`.
+    The STFT is linear, so the sum of the spectrograms equals the spectrogram of the remixed audio.
+    """
+    mix, instrument = song
+    partner_mix, partner_instrument = partner
+    windows = np.asarray(windows)
+    width = mix[0].shape[1]
+    _, origin, end = frame_range(windows, step, size, width)
+    # Frames of the rest repeated from `offset`, relative to the first frame covered by the windows
+    period = max(1, min(end - origin, partner_mix[0].shape[1] - offset))
+    blocks, shifts = [], []
+    position = 0
+    groups = runs(windows, step, size)
+    for number, run in enumerate(groups):
+        first, start, end = frame_range(run, step, size, width)
+        # Runs are followed by the next run at a multiple of `step`, the last run ends with the song
+        length = end - start if number == len(groups) - 1 else -(-(end - start) // step) * step
+        blocks.append((start, min(width, start + length) - start, position))
+        shifts.append(np.full(len(run), position // step - first))
+        position += length
+    # Windows follow the frames of their run, `runs` returns the sorted unique windows
+    remapped = windows + np.concatenate(shifts)[np.searchsorted(np.unique(windows), windows)]
+
+    remixed_mix, remixed_instrument = [], []
+    for channel, partner_channel, partner_vocals in zip(instrument, partner_mix, partner_instrument):
+        vocals = np.zeros((channel.shape[0], position), dtype=channel.dtype)
+        rest = np.zeros_like(vocals)
+        for start, length, target in blocks:
+            if length <= 0:
+                continue
+            frames = slice(target, target + length)
+            np.multiply(channel[:, start:start + length], np.float32(gains[0]), out=vocals[:, frames])
+            if partner_channel.shape[1] > offset:
+                indices = offset + (np.arange(start, start + length) - origin) % period
+                np.subtract(read_frames(partner_channel, indices), read_frames(partner_vocals, indices),
+                            out=rest[:, frames])
+        rest *= np.float32(gains[1])
+        remixed_instrument.append(vocals)
+        remixed_mix.append(np.add(vocals, rest, out=rest))
+    return (remixed_mix, remixed_instrument), remapped
+
+
+def augment(song, partner, windows, step, size, gain_db=(0, 0), random=None):
+    """
+    Remixes the windows of `song` with the rest of `partner` at a random offset and random gains in the range `gain_db`,
+    drawn by the numpy generator `random`.
+    """
+    random = np.random.default_rng() if random is None else random
+    low, high = gain_db
+    gains = np.power(10.0, random.uniform(low, high, 2) / 20)
+    _, start, end = frame_range(windows, step, size, song[0][0].shape[1])
+    offset = random.integers(0, max(0, partner[0][0].shape[1] - (end - start)) + 1)
+    return remix(song, partner, windows, step, size, gains, offset)
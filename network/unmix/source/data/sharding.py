@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Partitions the songs between training workers and reduces their validation metrics.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import json
+import os
+import time
+import keras
+
+from unmix.source.configuration import Configuration
+from unmix.source.exceptions.configurationerror import ConfigurationError
+from unmix.source.helpers import filehelper
+from unmix.source.logging.logger import Logger
+
+
+def world_size():
+    return Configuration.get('training.distribution.world_size', default=1)
+
+
+def rank():
+    value = Configuration.get('training.distribution.rank', default=0)
+    if not 0 <= value < world_size():
+        raise ConfigurationError('training.distribution.rank')
+    return value
+
+
+def enabled():
+    return world_size() > 1
+
+
+def shard(files, rank, world_size):
+    """
+    Returns the songs of worker `rank`, every `world_size`-th song of the consistently ordered songs.
+    All workers loading the same collection get disjoint shards differing by at most one song.
+    """
+    return files[rank::world_size]
+
+
+def reduce(folder, epoch, metrics, weight, rank, world_size, timeout=600):
+    """
+    Publishes the `metrics` of a worker in the shared `folder` and returns the means of all workers weighted by
+    `weight` (e.g. validation windows), waiting up to `timeout` seconds until all workers published the epoch.
+    """
+    os.makedirs(folder, exist_ok=True)
+    file = os.path.join(folder, 'epoch%05d_rank%03d.json')
+    temp_file = '%s.tmp' % (file % (epoch, rank))
+    with open(temp_file, 'w') as f:
+        json.dump({'weight': weight, 'metrics': metrics}, f)
+    os.replace(temp_file, file % (epoch, rank))
+
+    deadline = time.time() + timeout
+    missing = list(range(world_size))
+    results = []
+    while missing:
+        for worker in list(missing):
+            try:
+                with open(file % (epoch, worker), 'r') as f:
+                    results.append(json.load(f))
+                missing.remove(worker)
+            except FileNotFoundError:
+                pass
+        if missing:
+            if time.time() > deadline:
+                Logger.warn("Reduce metrics of epoch %d without workers %s." % (epoch, missing))
+                break
+            time.sleep(0.2)
+
+    total = sum(result['weight'] for result in results)
+    reduced = {}
+    for key in metrics:
+        values = [(result['metrics'][key], result['weight']) for result in results if key in result['metrics']]
+        if total > 0:
+            reduced[key] = sum(value * weight for value, weight in values) / total
+        else:
+            reduced[key] = sum(value for value, _ in values) / len(values)
+    return reduced
+
+
+class ReduceMetricsCallback(keras.callbacks.Callback):
+    '''Replaces the validation metrics of a worker by the weighted means of all workers.'''
+
+    def __init__(self, generator):
+        super().__init__()
+        self.generator = generator
+        folder = Configuration.get('training.distribution.folder', default='')
+        if not folder:
+            raise ConfigurationError('training.distribution.folder')
+        self.folder = filehelper.build_abspath(folder)
+        self.timeout = Configuration.get('training.distribution.timeout', default=600)
+
+    def on_epoch_end(self, epoch, logs=None):
+        if not logs:
+            return
+        metrics = {key: float(value) for key, value in logs.items() if key.startswith('val_')}
+        if metrics:
+            weight = len(self.generator) * self.generator.batch_size
+            logs.update(reduce(self.folder, epoch, metrics, weight, rank(), world_size(), self.timeout))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Song cache shared by data loading worker processes.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import numpy as np
+
+from unmix.source.data.songfeatures import TrackChannels
+from unmix.source.logging.logger import Logger
+
+
+HEADER_SIZE = 4096
+STATE_EMPTY = 0
+STATE_READY = 1
+TABLE_TYPE = np.dtype([('key', 'S40'), ('name', 'S32'), ('nbytes', np.int64), ('references', np.int32),
+                       ('last_used', np.float64), ('state', np.int8)])
+COUNTERS = ['hits', 'misses', 'evictions', 'resident_bytes']
+
+
+def is_shareable(song):
+    return all(isinstance(channel, np.ndarray) for channels in song for channel in channels)
+
+
+class SharedSongCache(object):
+    """
+    Decoded songs are published once into `multiprocessing.shared_memory` segments and mapped read-only by every
+    process. A shared table guarded by a process lock holds the segments with reference counts, if `max_bytes` would
+    be exceeded songs are evicted least recently used, preferring songs which are not mapped by any process.
+    Must be created before the worker processes are forked.
+    """
+
+    def __init__(self, max_bytes, slots=4096, max_attached=8):
+        self.max_bytes = max_bytes
+        self.max_attached = max_attached
+        self.owner = os.getpid()
+        self.mutex = multiprocessing.Lock()
+        size = TABLE_TYPE.itemsize * slots + 8 * len(COUNTERS)
+        self.table_memory = shared_memory.SharedMemory(create=True, size=size)
+        self.table_name = self.table_memory.name
+        self.__map_table()
+        self.table[:] = np.zeros(slots, dtype=TABLE_TYPE)
+        self.counters[:] = 0
+        self.pid = os.getpid()
+        self.attached = OrderedDict()
+        self.closing = []
+        atexit.register(self.close)
+
+    def __map_table(self):
+        slots = (self.table_memory.size - 8 * len(COUNTERS)) // TABLE_TYPE.itemsize
+        self.table = np.ndarray((slots,), dtype=TABLE_TYPE, buffer=self.table_memory.buf)
+        self.counters = np.ndarray((len(COUNTERS),), dtype=np.int64, buffer=self.table_memory.buf,
+                                   offset=TABLE_TYPE.itemsize * slots)
+
+    def __local(self):
+        # Mappings are private to a process, forked children start without any
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.attached = OrderedDict()
+            self.closing = []
+
+    @staticmethod
+    def __key(file):
+        return hashlib.sha1(os.path.abspath(file).encode('utf-8', 'surrogatepass')).hexdigest().encode()
+
+    def __find(self, key):
+        slots = np.flatnonzero((self.table['state'] == STATE_READY) & (self.table['key'] == key))
+        return slots[0] if len(slots) else None
+
+    def get(self, file):
+        self.__local()
+        key = SharedSongCache.__key(file)
+        if key in self.attached:
+            self.attached.move_to_end(key)
+            with self.mutex:
+                self.counters[COUNTERS.index('hits')] += 1
+            return self.attached[key][1]
+        with self.mutex:
+            slot = self.__find(key)
+            if slot is None:
+                self.counters[COUNTERS.index('misses')] += 1
+                return None
+            self.counters[COUNTERS.index('hits')] += 1
+            self.table['references'][slot] += 1
+            self.table['last_used'][slot] = time.time()
+            # Segments are only unlinked under the lock, a mapped segment stays valid after unlinking
+            memory = shared_memory.SharedMemory(name=self.table['name'][slot].decode())
+        return self.__attach(key, memory)
+
+    def put(self, file, song):
+        """
+        Publishes a song of numpy arrays and returns the shared read-only copy (or the song if it is not shared).
+        """
+        self.__local()
+        if not is_shareable(song):
+            return song
+        key = SharedSongCache.__key(file)
+        # Precomputed features follow the channels of their track
+        features = [sorted(getattr(channels, 'features', {}).items()) for channels in song]
+        arrays = [np.ascontiguousarray(array) for channels, track_features in zip(song, features)
+                  for array in list(channels) + [array for _, values in track_features for array in values]]
+        nbytes = sum(array.nbytes for array in arrays)
+        if nbytes > self.max_bytes:
+            return song
+
+        layout = {'groups': [len(channels) for channels in song], 'arrays': [],
+                  'features': [[(name, len(values)) for name, values in track_features] for track_features in features]}
+        offset = HEADER_SIZE
+        for array in arrays:
+            layout['arrays'].append({'shape': array.shape, 'dtype': array.dtype.str, 'offset': offset})
+            offset += array.nbytes
+        header = json.dumps(layout).encode('utf-8')
+        if len(header) > HEADER_SIZE:
+            return song
+        name = 'unmix_%d_%s' % (self.owner, key[:16].decode())
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True, size=max(1, offset))
+        except FileExistsError:
+            # Published concurrently by another process
+            published = self.get(file)
+            return song if published is None else published
+        memory.buf[:len(header)] = header
+        for array, entry in zip(arrays, layout['arrays']):
+            np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf, offset=entry['offset'])[...] = array
+
+        with self.mutex:
+            resident_bytes = COUNTERS.index('resident_bytes')
+            while self.counters[resident_bytes] + offset > self.max_bytes and self.__evict():
+                pass
+            free = np.flatnonzero(self.table['state'] == STATE_EMPTY)
+            if self.counters[resident_bytes] + offset > self.max_bytes or not len(free):
+                memory.close()
+                memory.unlink()
+                return song
+            slot = free[0]
+            self.table[slot] = (key, name.encode(), offset, 1, time.time(), STATE_READY)
+            self.counters[resident_bytes] += offset
+        self.__close_detached()
+        return self.__attach(key, memory)
+
+    def __attach(self, key, memory):
+        layout = json.loads(bytes(memory.buf[:HEADER_SIZE]).rstrip(b'\0').decode('utf-8'))
+        arrays = []
+        for entry in layout['arrays']:
+            array = np.ndarray(tuple(entry['shape']), dtype=np.dtype(entry['dtype']), buffer=memory.buf,
+                               offset=entry['offset'])
+            array.flags.writeable = False
+            arrays.append(array)
+        song = []
+        for count, track_features in zip(layout['groups'], layout['features']):
+            channels = arrays[:count]
+            arrays = arrays[count:]
+            if track_features:
+                features = {}
+                for name, feature_count in track_features:
+                    features[name] = arrays[:feature_count]
+                    arrays = arrays[feature_count:]
+                channels = TrackChannels(channels, features)
+            song.append(channels)
+        song = tuple(song)
+        self.attached[key] = (memory, song)
+        if len(self.attached) > self.max_attached:
+            with self.mutex:
+                while len(self.attached) > self.max_attached:
+                    self.__release(*self.attached.popitem(last=False))
+            self.__close_detached()
+        return song
+
+    def __release(self, key, attachment):
+        """
+        Drops the mapping of this process, the table lock must be held.
+        """
+        slot = self.__find(key)
+        if slot is not None:
+            self.table['references'][slot] = max(0, self.table['references'][slot] - 1)
+        self.closing.append(attachment[0])
+
+    def __close_detached(self):
+        remaining = []
+        for memory in self.closing:
+            try:
+                memory.close()
+            except BufferError:
+                remaining.append(memory)  # Windows of the song are still in use
+        self.closing = remaining
+
+    def __evict(self):
+        candidates = np.flatnonzero(self.table['state'] == STATE_READY)
+        if not len(candidates):
+            return False
+        # Prefer unmapped songs, mapped segments stay valid in the mapping processes after unlinking
+        # (references of terminated workers are never released)
+        order = np.lexsort((self.table['last_used'][candidates], self.table['references'][candidates] > 0))
+        slot = candidates[order[0]]
+        try:
+            memory = shared_memory.SharedMemory(name=self.table['name'][slot].decode())
+            memory.close()
+            memory.unlink()
+        except FileNotFoundError:
+            pass
+        self.counters[COUNTERS.index('resident_bytes')] -= self.table['nbytes'][slot]
+        self.counters[COUNTERS.index('evictions')] += 1
+        self.table['state'][slot] = STATE_EMPTY
+        return True
+
+    def statistics(self):
+        statistics = {counter: int(self.counters[i]) for i, counter in enumerate(COUNTERS)}
+        statistics['items'] = int(np.count_nonzero(self.table['state'] == STATE_READY))
+        return statistics
+
+    def close(self):
+        """
+        Removes all segments, only done by the creating process.
+        """
+        if os.getpid() != self.owner or self.table_memory is None:
+            return
+        for slot in np.flatnonzero(self.table['state'] == STATE_READY):
+            try:
+                memory = shared_memory.SharedMemory(name=self.table['name'][slot].decode())
+                memory.close()
+                memory.unlink()
+            except FileNotFoundError:
+                pass
+        self.table = None
+        self.counters = None
+        self.attached = OrderedDict()
+        try:
+            self.table_memory.close()
+            self.table_memory.unlink()
+        except Exception as e:
+            Logger.warn("Error while closing shared song cache: %s" % str(e))
+        self.table_memory = None
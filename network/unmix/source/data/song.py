@@ -10,18 +10,25 @@ __email__ = 'info@unmix.io'
 
 import glob
 import os
+import soundfile
 
+from unmix.source.configuration import Configuration
+from unmix.source.data import spectrogram_store
 from unmix.source.data.track import Track
 from unmix.source.exceptions.dataerror import DataError
 from unmix.source.helpers import spectrogramhandler
-from unmix.source.data.spectrogram_generator import generate_spectrogram
+from unmix.source.data.spectrogram_generator import calculate_width
 
 
 class Song(object):
     PREFIX_REST = 'rest_'
     PREFIX_INSTRUMENT = 'instrument_'
 
-    def __init__(self, folder):
+    @staticmethod
+    def find_files(folder):
+        """
+        Returns the instrument and rest file of a song folder, raises if one of them is missing.
+        """
         instrument_file = None
         for file in glob.iglob(os.path.join(folder, '%s*.wav' % Song.PREFIX_INSTRUMENT)):
             instrument_file = file
@@ -32,29 +39,60 @@ class Song(object):
             break
         if instrument_file is None or rest_file is None:
             raise DataError(folder, 'missing instrument or rest track')
-        data_instrument = generate_spectrogram(instrument_file)
+        return instrument_file, rest_file
+
+    def __init__(self, folder):
+        """
+        Reads the size of the song from the store or the audio headers, spectrograms are generated on loading.
+        """
+        instrument_file, rest_file = Song.find_files(folder)
+        self.store = spectrogram_store.open_song(folder, instrument_file, rest_file) \
+            if spectrogram_store.enabled() else None
+        data_instrument = data_rest = data_mix = None
         self.folder = folder
-        self.height = data_instrument['height']
-        data_rest = None
-        if rest_file is not None:
-            data_rest = generate_spectrogram(rest_file)
+        if self.store is not None:
+            data_instrument = spectrogram_store.read_data(self.store, 'instrument')
+            data_rest = spectrogram_store.read_data(self.store, 'rest')
+            data_mix = spectrogram_store.read_data(self.store, 'mix')
+            self.height = data_instrument['height']
             self.width = min(int(data_instrument['width']), int(data_rest['width']))
-        self.depth = data_instrument['depth']
-        self.fft_window = data_instrument['fft_window']
-        self.sample_rate = data_instrument['sample_rate']
-        self.collection = data_instrument['collection']
-        self.name = data_instrument['song']
+            self.depth = data_instrument['depth']
+            self.fft_window = data_instrument['fft_window']
+            self.sample_rate = data_instrument['sample_rate']
+            self.collection = data_instrument['collection']
+            self.name = data_instrument['song']
+        else:
+            self.fft_window = Configuration.get('spectrogram_generation.fft_length', default=1536)
+            self.sample_rate = Configuration.get('collection.sample_rate', default=44100)
+            self.height = self.fft_window // 2 + 1
+            self.width = min(calculate_width(info.frames, info.samplerate, self.sample_rate, self.fft_window)
+                             for info in [soundfile.info(instrument_file), soundfile.info(rest_file)])
+            self.depth = 2
+            self.collection = Configuration.get('collection.folder',
+                                                default=os.path.basename(os.path.dirname(os.path.dirname(
+                                                    instrument_file))))
+            self.name = os.path.basename(os.path.dirname(instrument_file))
         self.instrument = Track('instrument', self.height, self.width,
                                 self.depth, instrument_file, data_instrument)
         self.rest = Track('rest', self.height, self.width,
                           self.depth, rest_file, data_rest)
-        self.mix = Track('mix', self.height, self.width, self.depth)
+        self.mix = Track('mix', self.height, self.width, self.depth, data=data_mix)
 
-    def load(self, remove_panning=False, clean_up=True):
+    def load(self, remove_panning=False, clean_up=True, windowed=False):
+        """
+        Loads mix and instrument channels, if `windowed` the channels of a stored song are read per slice.
+        """
+        windowed = windowed and not remove_panning
         if not self.mix.initialized and self.rest is not None:
             try:
                 # After this step all tracks are initialized
-                self.mix.mix(self.instrument, self.rest)
+                if self.mix.data:
+                    self.mix.load(windowed=windowed)
+                    self.instrument.load(windowed=windowed)
+                    if not clean_up:
+                        self.rest.load(windowed=windowed)
+                else:
+                    self.mix.mix(self.instrument, self.rest)
                 if remove_panning:
                     self.mix.channels = spectrogramhandler.remove_panning(self.mix.channels)
             except Exception as e:
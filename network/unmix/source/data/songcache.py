@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Memory budgeted cache of loaded songs.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+from collections import OrderedDict
+from threading import Lock
+import numpy as np
+
+
+POLICY_LRU = 'lru'
+POLICY_COST = 'cost'
+
+
+def calculate_bytes(value):
+    """
+    Sums the bytes of all numpy arrays in (nested) lists and tuples including precomputed features, lazily read
+    channels count as zero.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        features = getattr(value, 'features', {})
+        return sum(calculate_bytes(v) for v in value) + sum(calculate_bytes(v) for v in features.values())
+    return 0
+
+
+class SongCache(object):
+    """
+    Caches songs up to `max_bytes` of resident arrays (and optionally `max_items` entries).
+    The `lru` policy evicts the least recently used song, the `cost` policy (greedy dual) prefers to keep songs which
+    were expensive to load (e.g. long songs) regardless of their size, aging entries which are not used.
+    """
+
+    def __init__(self, max_bytes, max_items=0, policy=POLICY_LRU):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.policy = policy
+        self.entries = OrderedDict()
+        self.mutex = Lock()
+        self.inflation = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resident_bytes = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.mutex:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            entry[2] = self.__priority(entry[3])
+            return entry[0]
+
+    def peek(self, key):
+        'Returns a cached song without counting a hit or changing the eviction order.'
+        with self.mutex:
+            entry = self.entries.get(key)
+            return None if entry is None else entry[0]
+
+    def keys(self):
+        with self.mutex:
+            return list(self.entries)
+
+    def put(self, key, value, cost=1.0):
+        """
+        Adds a song, `cost` is the effort to load it again (e.g. seconds). Songs larger than the budget are skipped.
+        """
+        nbytes = calculate_bytes(value)
+        if nbytes > self.max_bytes:
+            return
+        with self.mutex:
+            if key in self.entries:
+                self.resident_bytes -= self.entries.pop(key)[1]
+            while self.entries and (self.resident_bytes + nbytes > self.max_bytes or
+                                    (self.max_items > 0 and len(self.entries) >= self.max_items)):
+                self.__evict()
+            self.entries[key] = [value, nbytes, self.__priority(cost), cost]
+            self.resident_bytes += nbytes
+
+    def clear(self):
+        with self.mutex:
+            self.entries.clear()
+            self.resident_bytes = 0
+            self.inflation = 0.0
+
+    def statistics(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'resident_bytes': self.resident_bytes,
+            'items': len(self.entries)
+        }
+
+    def __priority(self, cost):
+        return self.inflation + cost
+
+    def __evict(self):
+        if self.policy == POLICY_COST:
+            key = min(self.entries, key=lambda k: self.entries[k][2])
+            self.inflation = self.entries[key][2]
+        else:
+            key = next(iter(self.entries))
+        self.resident_bytes -= self.entries.pop(key)[1]
+        self.evictions += 1
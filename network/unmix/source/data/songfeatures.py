@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Features of songs precomputed once per song and sliced by the transformers.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.exceptions.configurationerror import ConfigurationError
+from unmix.source.helpers import masker
+
+
+FEATURE_MAGNITUDE = 'magnitude'  # Magnitudes of mix and instrument (float32)
+FEATURE_PHASE = 'phase'  # Unit phase of the mix (complex)
+FEATURE_MASK = 'mask'  # Ratio mask of the instrument in the mix (float32)
+FEATURE_REST_DOMINANT = 'rest_dominant'  # Frames where the rest is louder than the instrument, complement of the IBM
+FEATURES = [FEATURE_MAGNITUDE, FEATURE_PHASE, FEATURE_MASK, FEATURE_REST_DOMINANT]
+
+
+class TrackChannels(list):
+    """
+    Channels of a track with precomputed features, a list of one array per channel for every feature.
+    """
+
+    def __init__(self, channels, features=None):
+        super().__init__(channels)
+        self.features = {} if features is None else features
+
+
+def configured():
+    """
+    Returns the features to precompute (`training.cache.features`).
+    """
+    features = list(Configuration.get('training.cache.features', default=[]) or [])
+    for feature in features:
+        if feature not in FEATURES:
+            raise ConfigurationError('training.cache.features')
+    return features
+
+
+def get(channels, feature):
+    """
+    Returns the precomputed channels of a feature or None.
+    """
+    return getattr(channels, 'features', {}).get(feature)
+
+
+def precompute(song, features):
+    """
+    Returns mix and instrument channels of a loaded song with the features. Lazily read songs are not changed.
+    """
+    mix, instrument = song
+    if not features or not all(isinstance(channel, np.ndarray) for channel in list(mix) + list(instrument)):
+        return song
+    mix_features, instrument_features = {}, {}
+    mix_magnitude = [np.abs(channel).astype(np.float32, copy=False) for channel in mix]
+    instrument_magnitude = [np.abs(channel).astype(np.float32, copy=False) for channel in instrument]
+    if FEATURE_MAGNITUDE in features:
+        mix_features[FEATURE_MAGNITUDE] = mix_magnitude
+        instrument_features[FEATURE_MAGNITUDE] = instrument_magnitude
+    if FEATURE_PHASE in features:
+        mix_features[FEATURE_PHASE] = [np.divide(channel, magnitude, out=np.ones_like(channel),
+                                                 where=magnitude != 0) for channel, magnitude in zip(mix, mix_magnitude)]
+    if FEATURE_MASK in features:
+        instrument_features[FEATURE_MASK] = [masker.mask(i, m) for i, m in zip(instrument_magnitude, mix_magnitude)]
+    if FEATURE_REST_DOMINANT in features:
+        # Stored as complement, windows padded with zeros keep the IBM of silence (1)
+        instrument_features[FEATURE_REST_DOMINANT] = [
+            (np.abs(m - i) > magnitude).astype(np.float32)
+            for m, i, magnitude in zip(mix, instrument, instrument_magnitude)]
+    return TrackChannels(mix, mix_features), TrackChannels(instrument, instrument_features)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Persisted metadata index of songs derived from audio headers.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import functools
+import json
+import os
+import soundfile
+from multiprocessing.pool import ThreadPool
+
+from unmix.source.configuration import Configuration
+from unmix.source.data.song import Song
+from unmix.source.data.spectrogram_generator import calculate_width
+from unmix.source.helpers import filehelper
+from unmix.source.logging.logger import Logger
+
+
+def __file_state(file):
+    stat = os.stat(file)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_entry(folder, entry=None, sample_rate=44100, fft_length=1536, mono=True):
+    """
+    Returns the index entry of a song, an existing entry is reused if both audio files are unchanged.
+    """
+    try:
+        instrument_file, rest_file = Song.find_files(folder)
+        state = __file_state(instrument_file) + __file_state(rest_file)
+        if entry is not None and entry.get('state') == state:
+            return folder, entry
+        instrument = soundfile.info(instrument_file)
+        rest = soundfile.info(rest_file)
+        channels = 1 if mono else min(instrument.channels, rest.channels, 2)
+        return folder, {
+            'width': min(calculate_width(instrument.frames, instrument.samplerate, sample_rate, fft_length),
+                         calculate_width(rest.frames, rest.samplerate, sample_rate, fft_length)),
+            'height': fft_length // 2 + 1,
+            'sample_rate': sample_rate,
+            'channels': channels,
+            'broken': False,
+            'state': state
+        }
+    except Exception as e:
+        return folder, {'broken': True, 'error': str(e)}
+
+
+class SongIndex(object):
+    """
+    Index shared by all data generators, songs are only read once per settings and file state.
+    """
+
+    entries = {}
+    persisted = {}
+    file = None
+
+    @staticmethod
+    def path():
+        sample_rate = Configuration.get('collection.sample_rate', default=44100)
+        fft_length = Configuration.get('spectrogram_generation.fft_length', default=1536)
+        stereo = Configuration.get('collection.stereo', default=False)
+        folder = filehelper.build_abspath(Configuration.get('collection.index.folder', default='cache/songindex'))
+        return os.path.join(folder, 'songindex_%d_%d_%s.json' % (sample_rate, fft_length,
+                                                                 'stereo' if stereo else 'mono'))
+
+    @staticmethod
+    def build(folders):
+        """
+        Adds all songs which are not yet indexed in this process, reading audio headers in parallel.
+        """
+        path = SongIndex.path()
+        if SongIndex.file != path:
+            SongIndex.persisted = SongIndex.__load(path)
+            SongIndex.entries = {}
+            SongIndex.file = path
+        missing = [folder for folder in dict.fromkeys(folders) if folder not in SongIndex.entries]
+        if not missing:
+            return SongIndex.entries
+
+        read = functools.partial(read_entry,
+                                 sample_rate=Configuration.get('collection.sample_rate', default=44100),
+                                 fft_length=Configuration.get('spectrogram_generation.fft_length', default=1536),
+                                 mono=not Configuration.get('collection.stereo', default=False))
+        arguments = [(folder, SongIndex.persisted.get(folder)) for folder in missing]
+        workers = Configuration.get('collection.index.workers', default=0) or os.cpu_count()
+        if workers > 1 and len(missing) > 1:
+            # Header reads are I/O bound, threads avoid forking the training process
+            with ThreadPool(min(workers, len(missing))) as pool:
+                results = pool.starmap(read, arguments)
+        else:
+            results = [read(*argument) for argument in arguments]
+        SongIndex.entries.update(results)
+        SongIndex.persisted.update(results)
+
+        broken = sum(1 for _, entry in results if entry['broken'])
+        Logger.debug("Indexed %d songs (%d broken)." % (len(results), broken))
+        SongIndex.__save(path)
+        return SongIndex.entries
+
+    @staticmethod
+    def get(folder):
+        if folder not in SongIndex.entries:
+            SongIndex.build([folder])
+        return SongIndex.entries[folder]
+
+    @staticmethod
+    def __load(path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r') as file:
+                return json.load(file)
+        except Exception as e:
+            Logger.warn("Ignore invalid song index '%s': %s" % (path, str(e)))
+            return {}
+
+    @staticmethod
+    def __save(path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_file = '%s.%d.tmp' % (path, os.getpid())
+            with open(temp_file, 'w') as file:
+                json.dump(SongIndex.persisted, file)
+            os.replace(temp_file, path)
+        except Exception as e:
+            Logger.warn("Could not write song index '%s': %s" % (path, str(e)))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Persistent content-addressed cache of generated spectrograms.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import hashlib
+import json
+import os
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.helpers import filehelper
+from unmix.source.logging.logger import Logger
+
+
+statistics = {
+    'hits': 0,
+    'misses': 0,
+    'bytes_read': 0,
+    'bytes_written': 0
+}
+
+
+def enabled():
+    return Configuration.get('spectrogram_generation.cache.enabled', default=False)
+
+
+def folder():
+    return filehelper.build_abspath(
+        Configuration.get('spectrogram_generation.cache.folder', default='cache/spectrograms'))
+
+
+def key(file, sample_rate, fft_length, mono, precision='single', resampler='soxr_hq', stft='scipy'):
+    """
+    Builds the cache key from the audio file state and all settings influencing the spectrogram.
+    `stft` identifies name and version of the STFT backend.
+    """
+    file = os.path.abspath(file)
+    stat = os.stat(file)
+    identity = [file, stat.st_mtime_ns, stat.st_size, sample_rate, fft_length, mono, precision, resampler, stft]
+    return hashlib.sha1(json.dumps(identity).encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def path(cache_key):
+    return os.path.join(folder(), cache_key[:2], cache_key + '.npy')
+
+
+def load(cache_key):
+    """
+    Returns the cached spectrograms (channels, height, width) as read-only memory map or None on a miss.
+    """
+    file = path(cache_key)
+    if not os.path.exists(file):
+        statistics['misses'] += 1
+        return None
+    try:
+        spectrograms = np.load(file, mmap_mode='r')
+    except Exception as e:
+        Logger.warn("Ignore invalid spectrogram cache entry '%s': %s" % (file, str(e)))
+        statistics['misses'] += 1
+        return None
+    statistics['hits'] += 1
+    statistics['bytes_read'] += spectrograms.nbytes
+    return spectrograms
+
+
+def save(cache_key, spectrograms):
+    """
+    Writes the spectrograms atomically, concurrent writers of the same entry are harmless.
+    """
+    file = path(cache_key)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    spectrograms = np.asarray(spectrograms)
+    temp_file = '%s.%d.tmp' % (file, os.getpid())
+    try:
+        with open(temp_file, 'wb') as f:
+            np.save(f, spectrograms)
+        os.replace(temp_file, file)
+        statistics['bytes_written'] += spectrograms.nbytes
+    except Exception as e:
+        Logger.warn("Could not write spectrogram cache entry '%s': %s" % (file, str(e)))
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def log_statistics(name=''):
+    if not enabled():
+        return
+    Logger.debug("%s spectrogram cache: %d hits, %d misses, %.1f MB read, %.1f MB written." % (
+        name, statistics['hits'], statistics['misses'],
+        statistics['bytes_read'] / 1e6, statistics['bytes_written'] / 1e6))
@@ -1,28 +1,71 @@
-import librosa
+import math
 import os
 import numpy as np
 from unmix.source.configuration import Configuration
+from unmix.source.data import audio_backend
+from unmix.source.data import spectrogram_cache
+from unmix.source.data import stft_backend
 
 
-def generate_stft(audio, fft_length):
-    stft = librosa.stft(audio, fft_length)
-    dimensions = (stft.shape[0], stft.shape[1], 2)
+PRECISION_SINGLE = 'single'
+PRECISION_DOUBLE = 'double'
+
+
+def precision():
+    return Configuration.get('spectrogram_generation.precision', default=PRECISION_SINGLE)
+
+
+def complex_type():
+    'Type of spectrograms, complex64 unless double precision is configured.'
+    return np.complex128 if precision() == PRECISION_DOUBLE else np.complex64
+
+
+def real_type():
+    return np.float64 if precision() == PRECISION_DOUBLE else np.float32
+
+
+def calculate_width(frames, file_sample_rate, sample_rate, fft_length):
+    """
+    Number of STFT frames generated for an audio file after resampling (centered, hop of fft_length / 4).
+    """
+    if file_sample_rate != sample_rate:
+        frames = int(math.ceil(frames * float(sample_rate) / file_sample_rate))
+    return 1 + frames // (fft_length // 4)
+
+
+def generate_stft(audio, fft_length, dtype=np.complex64):
+    stft = stft_backend.stft(audio, fft_length, dtype)
+    dimensions = (stft.shape[-2], stft.shape[-1], 2)
     return dimensions, stft
 
 
+def generate_spectrograms(file, mono, sample_rate, fft_length, dtype=np.complex64):
+    real = np.float64 if dtype == np.complex128 else np.float32
+    audio, sample_rate = audio_backend.load(file, sample_rate, mono=mono, dtype=real)
+    # Channels are transformed at once
+    dimensions, spectrograms = generate_stft(audio if audio.ndim == 1 else audio[:2], fft_length, dtype)
+    return list(spectrograms) if audio.ndim > 1 else [spectrograms], sample_rate
+
+
 def generate_spectrogram(file):
     mono = not Configuration.get('collection.stereo', default=False)
     sample_rate = Configuration.get('collection.sample_rate', default=44100)
     fft_length = Configuration.get('spectrogram_generation.fft_length', default=1536)
-    audio, sample_rate = librosa.load(file, mono=mono, sr=sample_rate)
-    mono = not isinstance(audio[0], np.ndarray)
-    if mono:
-        dimensions, spectrogram = generate_stft(audio, fft_length)
-        spectrograms = [spectrogram]
+    dtype = complex_type()
+    if spectrogram_cache.enabled():
+        cache_key = spectrogram_cache.key(file, sample_rate, fft_length, mono, precision(), audio_backend.resampler(),
+                                          stft_backend.identity())
+        spectrograms = spectrogram_cache.load(cache_key)
+        if spectrograms is None:
+            spectrograms, sample_rate = generate_spectrograms(file, mono, sample_rate, fft_length, dtype)
+            spectrogram_cache.save(cache_key, spectrograms)
+        else:
+            # Entries are memory mapped, channels are views on the cache file
+            spectrograms = list(spectrograms)
     else:
-        dimensions, spectrogram1 = generate_stft(audio[0], fft_length)
-        dimensions, spectrogram2 = generate_stft(audio[1], fft_length)
-        spectrograms = [spectrogram1, spectrogram2]
+        spectrograms, sample_rate = generate_spectrograms(file, mono, sample_rate, fft_length, dtype)
+    mono = len(spectrograms) == 1
+    dimensions = (spectrograms[0].shape[0], spectrograms[0].shape[1], 2)
     return {
         'spectrograms': spectrograms,
         'height': dimensions[0],
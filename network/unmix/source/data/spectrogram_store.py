@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Time-chunked HDF5 store of preprocessed song spectrograms.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import hashlib
+import os
+import h5py
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import audio_backend
+from unmix.source.data import spectrogram_generator
+from unmix.source.data import stft_backend
+from unmix.source.helpers import filehelper
+
+
+VERSION = 1
+TRACKS = ['instrument', 'rest', 'mix']
+
+
+def enabled():
+    return Configuration.get('spectrogram_generation.store.enabled', default=False)
+
+
+def folder():
+    return filehelper.build_abspath(
+        Configuration.get('spectrogram_generation.store.folder', default='cache/store'))
+
+
+def path(song_folder):
+    key = hashlib.sha1(os.path.abspath(song_folder).encode('utf-8', 'surrogatepass')).hexdigest()
+    return os.path.join(folder(), key[:2], key + '.h5')
+
+
+def __settings():
+    return {
+        'version': VERSION,
+        'sample_rate': Configuration.get('collection.sample_rate', default=44100),
+        'fft_window': Configuration.get('spectrogram_generation.fft_length', default=1536),
+        'stereo': Configuration.get('collection.stereo', default=False),
+        'precision': spectrogram_generator.precision(),
+        'resampler': audio_backend.resampler(),
+        'stft': stft_backend.identity()
+    }
+
+
+def __sources(instrument_file, rest_file):
+    sources = {}
+    for name, file in [('instrument', instrument_file), ('rest', rest_file)]:
+        stat = os.stat(file)
+        sources['%s_mtime' % name] = stat.st_mtime_ns
+        sources['%s_size' % name] = stat.st_size
+    return sources
+
+
+def __is_current(attributes, instrument_file, rest_file):
+    expected = {**__settings(), **__sources(instrument_file, rest_file)}
+    return all(key in attributes and attributes[key] == value for key, value in expected.items())
+
+
+def open_song(song_folder, instrument_file, rest_file):
+    """
+    Opens the stored spectrograms of a song read-only or returns None if the entry is missing or outdated.
+    """
+    file = path(song_folder)
+    if not os.path.exists(file):
+        return None
+    try:
+        store = h5py.File(file, 'r')
+    except OSError:
+        return None
+    if not __is_current(store.attrs, instrument_file, rest_file):
+        store.close()
+        return None
+    return store
+
+
+def contains(song_folder, instrument_file, rest_file):
+    store = open_song(song_folder, instrument_file, rest_file)
+    if store is None:
+        return False
+    store.close()
+    return True
+
+
+def read_data(store, track_type):
+    """
+    Returns the track in the format of `generate_spectrogram` with channels as lazily read HDF5 datasets.
+    """
+    attributes = store.attrs
+    return {
+        'spectrograms': [store[track_type][str(i)] for i in range(attributes['channels'])],
+        'height': int(attributes['height']),
+        'width': int(attributes['width']),
+        'depth': int(attributes['depth']),
+        'fft_window': int(attributes['fft_window']),
+        'sample_rate': int(attributes['sample_rate']),
+        'mono': attributes['channels'] == 1,
+        'song': attributes['song'],
+        'collection': attributes['collection'],
+        'windowed': True
+    }
+
+
+def write(song_folder, instrument_file, rest_file):
+    """
+    Generates and writes instrument, rest and mix spectrograms of a song, chunked along the time axis.
+    """
+    file = path(song_folder)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    data_instrument = spectrogram_generator.generate_spectrogram(instrument_file)
+    data_rest = spectrogram_generator.generate_spectrogram(rest_file)
+    width = min(int(data_instrument['width']), int(data_rest['width']))
+    channels = min(len(data_instrument['spectrograms']), len(data_rest['spectrograms']))
+    chunk_frames = min(width, Configuration.get('spectrogram_generation.store.chunk_frames', default=64))
+
+    instrument = [np.asarray(s[:, :width]) for s in data_instrument['spectrograms'][:channels]]
+    rest = [np.asarray(s[:, :width]) for s in data_rest['spectrograms'][:channels]]
+    mix = [i + r for i, r in zip(instrument, rest)]
+
+    temp_file = '%s.%d.tmp' % (file, os.getpid())
+    try:
+        with h5py.File(temp_file, 'w') as store:
+            for track_type, spectrograms in zip(TRACKS, [instrument, rest, mix]):
+                group = store.create_group(track_type)
+                for i, spectrogram in enumerate(spectrograms):
+                    group.create_dataset(str(i), data=spectrogram, chunks=(spectrogram.shape[0], chunk_frames))
+            attributes = {
+                **__settings(),
+                **__sources(instrument_file, rest_file),
+                'channels': channels,
+                'height': data_instrument['height'],
+                'width': width,
+                'depth': data_instrument['depth'],
+                'song': data_instrument['song'],
+                'collection': data_instrument['collection']
+            }
+            for key, value in attributes.items():
+                store.attrs[key] = value
+        os.replace(temp_file, file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    return file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Computes STFT and ISTFT of many channels at once with multithreaded FFTs.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import functools
+import inspect
+import os
+import librosa
+import numpy as np
+import scipy.fft
+import scipy.signal
+from numpy.lib.stride_tricks import sliding_window_view
+
+from unmix.source.configuration import Configuration
+from unmix.source.logging.logger import Logger
+
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft as pyfftw_fft
+    pyfftw.interfaces.cache.enable()
+except ImportError:
+    pyfftw_fft = None
+
+
+BACKEND_SCIPY = 'scipy'
+BACKEND_PYFFTW = 'pyfftw'
+BACKEND_LIBROSA = 'librosa'
+
+# Padding librosa applies to centered frames, changed from 'reflect' to 'constant' in librosa 0.10
+PAD_MODE = inspect.signature(librosa.stft).parameters['pad_mode'].default
+
+
+def backend():
+    name = Configuration.get('spectrogram_generation.fft.backend', default=BACKEND_SCIPY)
+    if name == BACKEND_PYFFTW and pyfftw_fft is None:
+        Logger.warn("pyFFTW is not installed, FFTs are computed by scipy.")
+        return BACKEND_SCIPY
+    return name
+
+
+def identity():
+    'Name and version of the FFT backend, spectrograms of different backends differ in the last bits.'
+    name = backend()
+    if name == BACKEND_PYFFTW:
+        return '%s-%s' % (name, pyfftw.__version__)
+    return '%s-%s' % (name, (librosa if name == BACKEND_LIBROSA else scipy).__version__)
+
+
+def workers():
+    'Threads per FFT call (0: number of cores).'
+    return Configuration.get('spectrogram_generation.fft.workers', default=0) or os.cpu_count()
+
+
+def block_frames():
+    'Frames transformed per call, bounds the memory of the framed signal.'
+    return Configuration.get('spectrogram_generation.fft.block_frames', default=2048)
+
+
+def fft_module():
+    return pyfftw_fft if backend() == BACKEND_PYFFTW else scipy.fft
+
+
+@functools.lru_cache(maxsize=16)
+def window(fft_length, dtype):
+    'Periodic hann window of librosa.'
+    window = scipy.signal.get_window('hann', fft_length, fftbins=True).astype(dtype)
+    window.flags.writeable = False
+    return window
+
+
+def stft(audio, fft_length, dtype=np.complex64, center=True):
+    """
+    Returns the spectrograms of `audio` (..., samples) as (..., fft_length // 2 + 1, frames), framed like
+    `librosa.stft` with a hann window and a hop of `fft_length // 4`. All channels are transformed by one FFT call
+    per block of frames.
+    """
+    if backend() == BACKEND_LIBROSA:
+        return librosa.stft(audio, n_fft=fft_length, dtype=dtype, center=center)
+    hop_length = fft_length // 4
+    real = np.float64 if dtype == np.complex128 else np.float32
+    audio = np.asarray(audio, dtype=real)
+    if center:
+        padding = [(0, 0)] * (audio.ndim - 1) + [(fft_length // 2, fft_length // 2)]
+        audio = np.pad(audio, padding, mode=PAD_MODE)
+    frames = sliding_window_view(audio, fft_length, axis=-1)[..., ::hop_length, :]
+    result = np.empty(audio.shape[:-1] + (fft_length // 2 + 1, frames.shape[-2]), dtype=dtype)
+    fft, window_values = fft_module(), window(fft_length, real)
+    step = max(1, block_frames())
+    for start in range(0, frames.shape[-2], step):
+        block = frames[..., start:start + step, :] * window_values
+        result[..., start:start + step] = np.swapaxes(fft.rfft(block, axis=-1, workers=workers()), -1, -2)
+    return result
+
+
+def istft(spectrograms, dtype=None):
+    """
+    Returns the audio (..., samples) of spectrograms (..., height, frames) like `librosa.istft` with the default
+    hann window and hop of `fft_length // 4`, all channels are inverted by one FFT call per block of frames.
+    """
+    spectrograms = np.asarray(spectrograms)
+    fft_length = 2 * (spectrograms.shape[-2] - 1)
+    hop_length = fft_length // 4
+    if backend() == BACKEND_LIBROSA or fft_length % hop_length:
+        return librosa.istft(spectrograms, dtype=dtype)
+    if dtype is None:
+        dtype = np.float64 if spectrograms.dtype == np.complex128 else np.float32
+    count = spectrograms.shape[-1]
+    overlaps = fft_length // hop_length
+    # Overlap-add of the windowed frames split into `overlaps` segments of one hop
+    audio = np.zeros(spectrograms.shape[:-2] + ((count + overlaps - 1) * hop_length,), dtype=dtype)
+    fft, window_values = fft_module(), window(fft_length, dtype)
+    step = max(1, block_frames())
+    for start in range(0, count, step):
+        end = min(count, start + step)
+        frames = fft.irfft(np.swapaxes(spectrograms[..., start:end], -1, -2), n=fft_length, axis=-1,
+                           workers=workers()).astype(dtype, copy=False)
+        frames *= window_values
+        segments = frames.reshape(frames.shape[:-1] + (overlaps, hop_length))
+        for overlap in range(overlaps):
+            target = audio[..., (start + overlap) * hop_length:(end + overlap) * hop_length]
+            target += segments[..., overlap, :].reshape(target.shape)
+
+    # Normalization by the sum of the squared windows (constant inside, falls off at the borders)
+    window_sum = np.zeros(audio.shape[-1], dtype=dtype)
+    squared = np.square(window_values).reshape((overlaps, hop_length))
+    for overlap in range(overlaps):
+        window_sum[overlap * hop_length:(count + overlap) * hop_length] += np.tile(squared[overlap], count)
+    audio = audio[..., fft_length // 2:audio.shape[-1] - fft_length // 2]
+    window_sum = window_sum[fft_length // 2:window_sum.shape[-1] - fft_length // 2]
+    nonzero = window_sum > np.finfo(dtype).tiny
+    audio[..., nonzero] /= window_sum[nonzero]
+    return audio
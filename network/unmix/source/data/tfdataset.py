@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Builds tf.data input pipelines producing the batches of a data generator.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import os
+import keras
+import numpy as np
+import tensorflow as tf
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import windowindex
+from unmix.source.helpers import filehelper
+from unmix.source.logging.logger import Logger
+
+
+PIPELINE_SEQUENCE = 'sequence'
+PIPELINE_TF_DATA = 'tf_data'
+CACHE_MEMORY = 'memory'
+
+
+def enabled():
+    return Configuration.get('training.data.pipeline', default=PIPELINE_SEQUENCE) == PIPELINE_TF_DATA
+
+
+def build(generator, shuffle=False):
+    """
+    Returns a dataset with the windows of `generator`: songs are interleaved, windows are loaded and transformed by
+    parallel map calls and batches are prefetched, all autotuned by TensorFlow.
+    Windows can be cached in memory or on disk (`training.data.tf_data.cache`) or snapshotted
+    (`training.data.tf_data.snapshot`), which repeats the windows of the first epoch.
+    Generators of the infinite sampler (`steps`) are repeated indefinitely, epochs end after their steps.
+    Limited songs keep the middle windows or, if the transformer shuffles, random windows per epoch like the index of
+    the data generator.
+    """
+    counts, limit = generator.window_counts()
+    songs = np.flatnonzero(counts > 0)
+    starts, ends = windowindex.limit_ranges(counts, limit) if limit > 0 else (np.zeros_like(counts), counts)
+    subset = limit > 0 and generator.transformer.shuffle and generator.steps <= 0
+    total = int(np.sum(ends - starts))
+    if not len(songs):
+        raise ValueError("No windows to build the %s dataset" % generator.name)
+
+    # Shapes and types of the transformer output, read from the first window
+    x, y = generator.load_window(songs[0], 0)
+    x, y = np.asarray(x), np.asarray(y)
+
+    counts = tf.constant(counts)
+    starts = tf.constant(starts)
+    ends = tf.constant(ends)
+
+    def windows(song):
+        window = tf.range(counts[song])
+        if subset:
+            window = tf.random.shuffle(window)
+        window = window[starts[song]:ends[song]]
+        if shuffle and not subset:
+            window = tf.random.shuffle(window)
+        return tf.data.Dataset.from_tensor_slices((tf.fill(tf.shape(window), song), window))
+
+    def load(song, window):
+        return tuple(np.asarray(data, dtype=reference.dtype)
+                     for data, reference in zip(generator.load_window(int(song), int(window)), (x, y)))
+
+    def load_window(song, window):
+        rest, instrument = tf.numpy_function(load, [song, window], [tf.as_dtype(x.dtype), tf.as_dtype(y.dtype)])
+        rest.set_shape(x.shape)
+        instrument.set_shape(y.shape)
+        return rest, instrument
+
+    dataset = tf.data.Dataset.from_tensor_slices(songs)
+    if shuffle:
+        dataset = dataset.shuffle(len(songs), reshuffle_each_iteration=True)
+    dataset = dataset.interleave(windows,
+                                 cycle_length=min(len(songs), Configuration.get('training.epoch.pool_size', default=5)),
+                                 num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    dataset = dataset.map(load_window, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+
+    cache = Configuration.get('training.data.tf_data.cache', default='')
+    snapshot = Configuration.get('training.data.tf_data.snapshot', default='')
+    if cache == CACHE_MEMORY:
+        dataset = dataset.cache()
+    elif cache:
+        folder = filehelper.build_abspath(cache)
+        os.makedirs(folder, exist_ok=True)
+        dataset = dataset.cache(os.path.join(folder, generator.name))
+    elif snapshot:
+        dataset = dataset.snapshot(os.path.join(filehelper.build_abspath(snapshot), generator.name))
+    if shuffle and (cache or snapshot):
+        dataset = dataset.shuffle(Configuration.get('training.data.tf_data.shuffle_buffer', default=1024))
+
+    if generator.steps > 0:
+        dataset = dataset.repeat()
+    dataset = dataset.batch(generator.batch_size, drop_remainder=True)
+    if generator.steps <= 0:
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(total // generator.batch_size))
+    Logger.debug("Built %s dataset with %d windows of %d songs." % (generator.name, total, len(songs)))
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class EpochEndCallback(keras.callbacks.Callback):
+    '''Runs the epoch end handling (logging, accuracy evaluation) of data generators replaced by datasets.
+    Datasets build their own windows, so the window index of the generators is not regenerated.'''
+
+    def __init__(self, generators):
+        super().__init__()
+        self.generators = generators
+
+    def on_epoch_end(self, epoch, logs=None):
+        for generator in self.generators:
+            generator.end_epoch()
@@ -8,11 +8,11 @@ Model of a track of a song.
 __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
-from functools import reduce
 import h5py
 import numpy as np
 from threading import Lock
 
+from unmix.source.data.spectrogram_generator import generate_spectrogram
 from unmix.source.exceptions.dataerror import DataError
 from unmix.source.helpers import converter
 
@@ -29,25 +29,34 @@ class Track(object):
         self.depth = depth
         self.mutex = Lock()
 
-    def load(self, data=None):
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['mutex']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.mutex = Lock()
+
+    def load(self, data=None, windowed=False):
         self.mutex.acquire()  # make sure only one thread loads the file
         try:
             if self.initialized:
                 return self
-            if not self.data and data is not None:
-                self.data = generate_spectrogram(self.file)
+            if not self.data:
+                # Tracks of audio files are generated on first loading
+                self.data = data if data is not None or self.file is None else generate_spectrogram(self.file)
             if not self.data:
                 raise DataError('?' if self.file is None else self.file, "missing data to load")
             self.stereo = not self.data['mono']
-            if self.stereo:
-                self.channels = np.array([
-                    self.data['spectrograms'][0][:, :self.width],
-                    self.data['spectrograms'][1][:, :self.width]
-                ])
+            self.width = min(self.width, int(self.data['width']))
+            if windowed and self.data.get('windowed'):
+                # Keep the stored channels, windows are read on slicing
+                self.channels = self.data['spectrograms'][:2 if self.stereo else 1]
             else:
-                self.channels = np.array([
-                    self.data['spectrograms'][0][:, :self.width]
-                ])
+                # Views on the spectrograms (read once from lazily read datasets)
+                self.channels = [np.asarray(spectrogram[:, :self.width])
+                                 for spectrogram in self.data['spectrograms'][:2 if self.stereo else 1]]
             self.initialized = True
             return self
         except Exception as e:
@@ -60,8 +69,14 @@ class Track(object):
         try:
             if self.initialized:
                 return self
-            self.channels = reduce((lambda x, y: x + y),
-                                   map(lambda track: track.load().channels, tracks))
+            # Sums into one allocation per channel
+            width = min(track.load().width for track in tracks)
+            channels = [np.array(channel[:, :width]) for channel in tracks[0].channels]
+            for track in tracks[1:]:
+                for channel, other in zip(channels, track.channels):
+                    np.add(channel, other[:, :width], out=channel)
+            self.width = width
+            self.channels = channels
             self.initialized = True
             return self
         finally:
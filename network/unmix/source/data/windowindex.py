@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Compact array based index of the training windows of all songs.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+import numpy as np
+
+
+INDEX_TYPE = np.dtype([('song', np.int32), ('window', np.int32)])
+
+
+def limit_ranges(counts, limit):
+    """
+    Returns start and end position of the `limit` middle items per song.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.floor(np.maximum(0, counts / 2 - limit / 2)).astype(np.int64)
+    ends = np.floor(np.minimum(counts, starts + limit)).astype(np.int64)
+    return starts, ends
+
+
+def build(counts, shuffle=False, limit=0):
+    """
+    Builds the index of all windows with `counts[song]` windows per song, ordered by song.
+    If `shuffle` the windows of every song are permuted, `limit` keeps the middle items of every song.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    songs = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.arange(len(songs), dtype=np.int64) - offsets
+    windows = positions
+    if shuffle:
+        # Sorting by song and a random key permutes the windows inside every song
+        windows = windows[np.lexsort((np.random.random(len(songs)), songs))]
+
+    index = np.empty(len(songs), dtype=INDEX_TYPE)
+    index['song'] = songs
+    index['window'] = windows
+    if limit > 0:
+        starts, ends = limit_ranges(counts, limit)
+        index = index[(positions >= np.repeat(starts, counts)) & (positions < np.repeat(ends, counts))]
+    return index
+
+
+def shuffle_in_pools(index, pool_size):
+    """
+    Shuffles the index in pools of `pool_size` random songs, windows are interleaved randomly inside every pool.
+    Keeps the working set of a data generator at `pool_size` songs while the order stays close to a global shuffle.
+    """
+    songs = np.unique(index['song'])
+    pools = np.empty(songs.max() + 1 if len(songs) else 0, dtype=np.int64)
+    pools[np.random.permutation(songs)] = np.arange(len(songs)) // max(1, pool_size)
+    return index[np.lexsort((np.random.random(len(index)), pools[index['song']]))]
+
+
+def offsets(counts, limit=0):
+    """
+    Returns the first window of every song and the cumulative window counts (starting at 0) to sample windows of
+    `counts[song]` windows per song, `limit` keeps the middle items of every song.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    starts, ends = limit_ranges(counts, limit) if limit > 0 else (np.zeros_like(counts), counts)
+    return starts, np.concatenate(([0], np.cumsum(ends - starts)))
+
+
+def sample(starts, offsets, size, random):
+    """
+    Draws `size` windows uniformly with replacement from the windows of all songs (see `offsets`) with the numpy
+    generator `random`, ordered by song.
+    """
+    positions = random.integers(0, offsets[-1], size)
+    songs = np.searchsorted(offsets, positions, side='right') - 1
+    index = np.empty(size, dtype=INDEX_TYPE)
+    index['song'] = songs
+    index['window'] = starts[songs] + positions - offsets[songs]
+    return np.sort(index)
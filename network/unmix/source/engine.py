@@ -9,6 +9,7 @@ __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
 
+import inspect
 import os
 import tensorflow as tf
 import tensorflow.keras as keras
@@ -17,6 +18,9 @@ from unmix.source.callbacks.callbacksfactory import CallbacksFactory
 from unmix.source.configuration import Configuration
 from unmix.source.data.datagenerator import DataGenerator
 from unmix.source.data.dataloader import DataLoader
+from unmix.source.data.songindex import SongIndex
+from unmix.source.data import sharding
+from unmix.source.data import tfdataset
 from unmix.source.logging.logger import Logger
 from unmix.source.helpers import converter
 from unmix.source.lossfunctions.lossfunctionfactory import LossFunctionFactory
@@ -65,34 +69,80 @@ class Engine:
 
     def train(self, epoch_start=0):
         training_songs, validation_songs, test_songs = DataLoader.load()
-        
+        if sharding.enabled():
+            # Every worker only indexes, caches and decodes its shard, tests run on the first worker
+            rank, world_size = sharding.rank(), sharding.world_size()
+            training_songs = sharding.shard(training_songs, rank, world_size)
+            validation_songs = sharding.shard(validation_songs, rank, world_size)
+            test_songs = test_songs if rank == 0 else None
+            Logger.info("Worker %d of %d trains on %d songs and validates on %d songs." % (
+                rank, world_size, len(training_songs), len(validation_songs)))
+        # Index all songs at once, the generators share the index
+        SongIndex.build(training_songs + validation_songs)
+
         self.accuracy = Accuracy(self)
         self.training_generator = DataGenerator('training',
-                                                self, training_songs, self.transformer)
+                                                self, training_songs, self.transformer, augment=True,
+                                                steps=Configuration.get('training.epoch.steps_per_epoch', default=0))
         self.validation_generator = DataGenerator('validation',
-                                                  self, validation_songs, self.transformer, self.accuracy)
+                                                  self, validation_songs, self.transformer, self.accuracy,
+                                                  steps=Configuration.get('training.epoch.validation_steps', default=0))
         self.test_songs = test_songs
 
         def build_validation_generator(): return DataGenerator(
             'validation_tensorboard', self, validation_songs, self.transformer)
         # Pass a new data generator here because TensorBoard must have access to validation_data
         self.callbacks = CallbacksFactory.build(build_validation_generator)
+        if sharding.enabled():
+            # Reduced before checkpoints, early stopping and learning rate schedules read the metrics
+            self.callbacks.insert(0, sharding.ReduceMetricsCallback(self.validation_generator))
+            if self.training_generator.steps <= 0:
+                Logger.warn("Workers train different numbers of batches per epoch, use the infinite sampler "
+                            "with training.epoch.steps_per_epoch.")
+
+        training_data = self.training_generator
+        validation_data = self.validation_generator
+        data_loading_options = self.data_loading_options()
+        if tfdataset.enabled():
+            training_data = tfdataset.build(self.training_generator,
+                                            shuffle=Configuration.get('training.epoch.shuffle', default=False))
+            validation_data = tfdataset.build(self.validation_generator)
+            # Datasets of the infinite sampler repeat, Keras ends the epochs after the steps of the generators
+            data_loading_options = {
+                'steps_per_epoch': len(self.training_generator) if self.training_generator.steps > 0 else None,
+                'validation_steps': len(self.validation_generator) if self.validation_generator.steps > 0 else None
+            }
+            self.callbacks.append(tfdataset.EpochEndCallback([self.training_generator, self.validation_generator]))
+            Logger.info("Load training data with tf.data pipeline.")
+        else:
+            Logger.info("Load training data with %d %s worker(s)." % (
+                self.training_generator.workers, 'process' if self.training_generator.use_multiprocessing else 'thread'))
 
         epoch_count = Configuration.get('training.epoch.count', optional=False)
         history = self.model.fit(
-            self.training_generator,
-            validation_data=self.validation_generator,
+            training_data,
+            validation_data=validation_data,
             initial_epoch=epoch_start,
             epochs=epoch_start + epoch_count,
             shuffle=False,
-            max_queue_size=10,
             verbose=Configuration.get('training.verbose'),
-            callbacks=self.callbacks)
+            callbacks=self.callbacks,
+            **data_loading_options)
         self.save()
         self.save_weights()
         self.accuracy.evaluate(len(history.epoch))
         return history
 
+    def data_loading_options(self):
+        'Keras 2 takes the worker options in fit, Keras 3 reads them from the data generator.'
+        if 'workers' not in inspect.signature(self.model.fit).parameters:
+            return {}
+        return {
+            'workers': self.training_generator.workers,
+            'use_multiprocessing': self.training_generator.use_multiprocessing,
+            'max_queue_size': self.training_generator.max_queue_size
+        }
+
     def save(self):
         'Saves the model as json and h5 (including weights) files.'
         path = os.path.join(Configuration.output_directory, 'model.%s')
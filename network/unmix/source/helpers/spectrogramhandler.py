@@ -17,13 +17,14 @@ import skimage.io as io
 from matplotlib.cm import get_cmap
 
 from unmix.source.configuration import Configuration
+from unmix.source.data import stft_backend
 from unmix.source.helpers import reducer
 from unmix.source.logging.logger import Logger
 
 
 def to_audio(file, spectrogram):
     try:
-        audio = np.array(librosa.istft(spectrogram))
+        audio = stft_backend.istft(spectrogram)
         path = os.path.join(Configuration.get_path(
             'environment.temp_folder', optional=False), file)
         librosa.output.write_wav(path, audio, 11025, norm=False)
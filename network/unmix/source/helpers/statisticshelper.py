@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Helps accumulating mean and variance of magnitudes in parallel (Welford / Chan).
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import numpy as np
+
+
+def calculate(magnitudes):
+    """
+    Returns count, mean and sum of squared differences per frequency bin and channel of (channels, bins, frames).
+    """
+    magnitudes = np.asarray(magnitudes, dtype=np.float64)
+    mean = np.mean(magnitudes, axis=2)
+    m2 = np.sum(np.square(magnitudes - mean[:, :, np.newaxis]), axis=2)
+    return magnitudes.shape[2], mean.T, m2.T
+
+
+def merge(a, b):
+    """
+    Merges two partial statistics (count, mean, m2) of the same shape.
+    """
+    count_a, mean_a, m2_a = a
+    count_b, mean_b, m2_b = b
+    count = count_a + count_b
+    if count == 0:
+        return a
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + np.square(delta) * (count_a * count_b / count)
+    return count, mean, m2
+
+
+def finalize(statistics):
+    """
+    Returns the zmuv normalizer statistics: global mean and variance and per bin (bins, channels) values.
+    """
+    count, mean, m2 = statistics
+    # All bins have the same count, the global values merge the bins
+    global_mean = np.mean(mean)
+    global_m2 = np.sum(m2) + count * np.sum(np.square(mean - global_mean))
+    return {
+        'mean': float(global_mean),
+        'variance': float(global_m2 / (count * mean.size)),
+        'bin_mean': mean.tolist(),
+        'bin_variance': (m2 / count).tolist(),
+        'count': int(count)
+    }
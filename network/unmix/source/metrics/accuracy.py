@@ -8,7 +8,6 @@ Calculates the accuracy over a test set using the mir_eval bss evaluation.
 __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
-import librosa
 import mir_eval
 import numpy as np
 import os
@@ -19,6 +18,7 @@ from unmix.source.logging.logger import Logger
 from unmix.source.data.song import Song
 from unmix.source.prediction.mixprediction import MixPrediction
 from unmix.source.configuration import Configuration
+from unmix.source.data import stft_backend
 
 
 class Accuracy(object):
@@ -111,9 +111,8 @@ class Accuracy(object):
 
     def __calculate_accuracy(self, original_vocals, orignal_instrumental, predicted_vocals, predicted_instrumental):
         return mir_eval.separation.bss_eval_sources(
-            np.array([librosa.istft(original_vocals),
-                      librosa.istft(orignal_instrumental)]),
-            np.array([librosa.istft(predicted_vocals), librosa.istft(predicted_instrumental)]), compute_permutation=False)
+            stft_backend.istft([original_vocals, orignal_instrumental]),
+            stft_backend.istft([predicted_vocals, predicted_instrumental]), compute_permutation=False)
 
     def __calculate_median(self, accuracies, type, epoch):
         return {
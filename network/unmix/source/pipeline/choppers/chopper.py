@@ -10,6 +10,7 @@ __email__ = "info@unmix.io"
 
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import math
 
 from unmix.source.exceptions.configurationerror import ConfigurationError
@@ -29,6 +30,52 @@ class Chopper:
         chunk = input[:, max(0, start):min(end, input.shape[1])]
         return np.pad(chunk, ((0,0),(pad_count_left,pad_count_right)), "constant")
 
+    def chop_many(self, input, indices, size):
+        """
+        Returns the windows at `indices` (identical to chop_n_pad) as array (len(indices), height, size).
+        The covered part of the input is sliced and padded once, ascending consecutive indices return read-only strided views.
+        Scattered indices and lazy inputs (store datasets, audio ranges) are sliced per run of overlapping windows,
+        so only the frames covered by the windows are read.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if not len(indices):
+            return np.zeros((0, input.shape[0], size), dtype=input.dtype)
+        span = self.step * int(indices.max() - indices.min()) + size
+        if isinstance(input, np.ndarray) and span <= 2 * len(indices) * size:
+            return self.__chop_span(input, indices, size)
+        order = np.argsort(indices, kind='stable')
+        ordered = indices[order]
+        runs = np.flatnonzero(np.diff(ordered) * self.step > size) + 1
+        windows = None
+        for positions in np.split(np.arange(len(ordered)), runs):
+            chops = self.__chop_span(input, ordered[positions], size)
+            if windows is None:
+                windows = np.empty((len(indices),) + chops.shape[1:], dtype=chops.dtype)
+            windows[order[positions]] = chops
+        return windows
+
+    def __chop_span(self, input, indices, size):
+        first = indices.min()
+        start = self.step * first - size // 2
+        end = self.step * indices.max() - size // 2 + size
+        chunk = input[:, max(0, start):min(end, input.shape[1])]
+        pad_count_left = -min(0, start)
+        if pad_count_left or chunk.shape[1] < end - start:
+            padded = np.zeros((chunk.shape[0], end - start), dtype=chunk.dtype)
+            padded[:, pad_count_left:pad_count_left + chunk.shape[1]] = chunk
+        else:
+            padded = np.asarray(chunk)
+        windows = sliding_window_view(padded, size, axis=1)[:, ::self.step]
+        positions = indices - first
+        if np.array_equal(positions, np.arange(len(positions))):
+            windows = windows[:, :len(positions)]
+        else:
+            windows = windows[:, positions]
+        return np.moveaxis(windows, 1, 0)
+
+    def chop_all(self, input, size):
+        return self.chop_many(input, np.arange(self.calculate_chops(input.shape[1], size)), size)
+
     def calculate_chops(self, input_width, size):
         max_width = input_width + size // 2 # at each end of the input, we maximal pad size / 2
         return math.ceil(max_width / self.step)
@@ -30,5 +30,15 @@ def normalize(input, target=None):
     return input, target
 
 
+def normalize_batch(input, target=None):
+    'Normalizes every window of a batch like normalize.'
+    max = np.max(input, axis=tuple(range(1, input.ndim)), keepdims=True)
+    max = np.where(max > 0, max, 1)
+    input = input / max
+    if target is not None:
+        target = target / max
+    return input, target
+
+
 def denormalize(input, target=None):
     return input, target
@@ -32,5 +32,19 @@ def normalize(input, target=None):
     return input, target
 
 
+def normalize_batch(input, target=None):
+    'Normalizes every window of a batch like normalize.'
+    axis = tuple(range(1, input.ndim))
+    max = np.max(input, axis=axis, keepdims=True)
+    min = np.min(input, axis=axis, keepdims=True)
+    difference = max - min
+    valid = difference > 0
+    difference = np.where(valid, difference, 1)
+    normalized = np.where(valid, (input - min) / difference, input)
+    if target is not None:
+        target = np.where(valid, (normalized - min) / difference, target)
+    return normalized, target
+
+
 def denormalize(input, target=None):
     return input, target
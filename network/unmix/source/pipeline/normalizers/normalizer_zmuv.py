@@ -11,6 +11,7 @@ __email__ = "info@unmix.io"
 
 import json
 import numpy as np
+import os
 
 from unmix.source.configuration import Configuration
 from unmix.source.exceptions.configurationerror import ConfigurationError
@@ -23,36 +24,74 @@ MODE_BIN = 'frequency_bin'
 MODE_SINGLE = 'single'
 
 
+normalizers = {}
+
+
+class ZmuvNormalizer(object):
+    """
+    Statistics of a zmuv normalizer, read once and shaped to broadcast over windows (height, width, channels)
+    and batches of windows.
+    """
+
+    def __init__(self, mode, config):
+        if mode == MODE_SINGLE:
+            mean = np.array(config['mean'])
+            variance = np.array(config['variance'])
+        elif mode == MODE_BIN:
+            mean = np.array(config['bin_mean'])
+            variance = np.array(config['bin_variance'])
+        else:
+            raise ConfigurationError('Invalid zmuv normalizer configuration.')
+        self.mode = mode
+        self.mean = mean.astype(np.float32)
+        self.deviation = np.sqrt(variance).astype(np.float32)
+        self.scale = (1 / np.sqrt(variance)).astype(np.float32)
+
+    def __statistics(self, data):
+        if self.mode == MODE_BIN:
+            # One value per frequency bin (and channel), broadcast over the window width
+            shape = (data.shape[-3], 1, -1)
+            return self.mean.reshape(shape), self.scale.reshape(shape), self.deviation.reshape(shape)
+        return self.mean, self.scale, self.deviation
+
+    def normalize(self, data, out=None):
+        'Normalizes to zero mean and unit variance, in place if `out` is `data`.'
+        mean, scale, _ = self.__statistics(data)
+        out = np.subtract(data, mean, out=out)
+        return np.multiply(out, scale, out=out)
+
+    def denormalize(self, data, out=None):
+        mean, _, deviation = self.__statistics(data)
+        out = np.multiply(data, deviation, out=out)
+        return np.add(out, mean, out=out)
+
+
+def path(config_file):
+    'Statistics files are relative to the collection folder.'
+    if os.path.isabs(config_file):
+        return config_file
+    return filehelper.build_abspath(config_file, Configuration.get_path('collection.folder'))
+
+
+def load(mode, config_file):
+    'Returns the normalizer of a statistics file, files are only read once.'
+    config_file = path(config_file)
+    key = (mode, config_file)
+    if key not in normalizers:
+        normalizers[key] = ZmuvNormalizer(mode, __read_config(config_file))
+    return normalizers[key]
+
+
 def normalize(data, mode, config_file):
     'Normalizes training data to zero mean and unit variance.'
-    config = __read_config(config_file)
-    if mode == MODE_SINGLE:
-        mean = np.array(config['mean'])
-        variance = np.array(config['variance'])
-    elif mode == MODE_BIN:
-        mean = np.repeat(np.reshape(config['bin_mean'], (data.shape[0], 1, data.shape[2])), data.shape[1], axis=1)
-        variance = np.repeat(np.reshape(config['bin_variance'], (data.shape[0], 1, data.shape[2])), data.shape[1], axis=1)
-    else:        
-        raise ConfigurationError('Invalid zmuv normalizer configuration.')
-    
-    return (data - mean) / np.sqrt(variance)
+    return load(mode, config_file).normalize(data)
 
 
 def denormalize(data,  mode, config_file):
     'Returns denormalized values aways with previous mean and variance.'
-    config = __read_config(config_file)
-    if mode == MODE_SINGLE:
-        mean = np.array(config['mean'])
-        variance = np.array(config['variance'])
-    elif mode == MODE_BIN:
-        mean = np.repeat(np.reshape(config['bin_mean'], (data.shape[0], 1, data.shape[2])), data.shape[1], axis=1)
-        variance = np.repeat(np.reshape(config['bin_variance'], (data.shape[0], 1, data.shape[2])), data.shape[1], axis=1)
-    else:        
-        raise ConfigurationError('Invalid zmuv normalizer configuration.')
-
-    return (data * np.sqrt(variance)) + mean
+    return load(mode, config_file).denormalize(data)
 
 
 def __read_config(config_file):
-    with open(filehelper.build_abspath(config_file, Configuration.get_path('collection.folder'))) as file:
+    with open(config_file) as file:
         return json.load(file)
@@ -13,6 +13,8 @@ import numpy as np
 
 from unmix.source.pipeline.choppers.chopper import Chopper
 from unmix.source.configuration import Configuration
+from unmix.source.data import songfeatures
+from unmix.source.helpers import masker
 from unmix.source.helpers import spectrogramhandler
 import unmix.source.pipeline.normalizers.normalizer_real_imag as normalizer_real_imag
 
@@ -30,37 +32,101 @@ class BaseTransformer(object):
         return self.chopper.calculate_chops(width, self.size)
 
     def transform_input(self, data, index):
-        input = [self.chopper.chop_n_pad(data[0], index, self.size)]
-        if self.stereo:
-            input.append(self.chopper.chop_n_pad(data[1], index, self.size))
-        return input
+        return list(self.transform_input_batch(data, [index])[0])
 
-    def prenormalize_window(self, mix, vocals, index):
-        input = self.transform_input(mix, index)
-        target = self.transform_input(vocals, index)
+    def transform_input_batch(self, data, indices):
+        """
+        Returns the complex windows at `indices` as (len(indices), channels, height, size).
+        """
+        return np.stack([self.chopper.chop_many(data[channel], indices, self.size)
+                         for channel in range(2 if self.stereo else 1)], axis=1)
 
-        normalized_input = normalizer_real_imag.normalize(input)
-        normalized_target = normalizer_real_imag.normalize(target)
+    def magnitude_batch(self, data, indices, out=None):
+        """
+        Returns the magnitudes of the windows at `indices` as (len(indices), height, size, channels) in float32,
+        written into `out` if given (must be contiguous).
+        """
+        channels = 2 if self.stereo else 1
+        if out is None:
+            out = np.empty((len(indices), data[0].shape[0], self.size, channels), dtype=np.float32)
+        # Channels are laid out like reshaping the (channels, height, size) magnitudes of every window
+        view = out.reshape((len(indices), channels) + out.shape[1:3])
+        magnitude = songfeatures.get(data, songfeatures.FEATURE_MAGNITUDE)
+        for channel in range(channels):
+            if magnitude is not None:
+                view[:, channel] = self.chopper.chop_many(magnitude[channel], indices, self.size)
+            else:
+                np.abs(self.chopper.chop_many(data[channel], indices, self.size), out=view[:, channel])
+        return out
+
+    def phase_batch(self, data, indices):
+        """
+        Returns the unit phases of the windows at `indices` as (len(indices), channels, height, size).
+        """
+        phase = songfeatures.get(data, songfeatures.FEATURE_PHASE)
+        if phase is not None:
+            return np.stack([self.chopper.chop_many(phase[channel], indices, self.size)
+                             for channel in range(2 if self.stereo else 1)], axis=1)
+        return np.exp(np.angle(self.transform_input_batch(data, indices)) * 1j)
 
-        # Reshape to put channels information in last dimension
-        normalized_input = np.reshape(
-            normalized_input, normalized_input.shape[1:-1] + (2 if self.stereo else 1,))
-        normalized_target = np.reshape(
-            normalized_target, normalized_target.shape[1:-1] + (2 if self.stereo else 1,))
+    def mask_batch(self, mix, vocals, indices, binary=False):
+        """
+        Returns the ratio (or ideal binary) masks of the vocals at `indices` as (len(indices), channels, height, size).
+        """
+        channels = range(2 if self.stereo else 1)
+        if binary:
+            rest_dominant = songfeatures.get(vocals, songfeatures.FEATURE_REST_DOMINANT)
+            if rest_dominant is not None:
+                return 1 - np.stack([self.chopper.chop_many(rest_dominant[channel], indices, self.size)
+                                     for channel in channels], axis=1)
+            mix_slice = self.transform_input_batch(mix, indices)
+            vocal_slice = self.transform_input_batch(vocals, indices)
+            return (np.abs(mix_slice - vocal_slice) <= np.abs(vocal_slice)).astype(np.float32)
+        mask = songfeatures.get(vocals, songfeatures.FEATURE_MASK)
+        if mask is not None:
+            return np.stack([self.chopper.chop_many(mask[channel], indices, self.size) for channel in channels], axis=1)
+        mix_magnitude = self.magnitude_batch(mix, indices)
+        vocal_magnitude = self.magnitude_batch(vocals, indices)
+        return masker.mask(vocal_magnitude, mix_magnitude).reshape((len(indices), len(channels), -1, self.size))
 
-        return normalized_input, normalized_target
+    def prenormalize_window(self, mix, vocals, index):
+        normalized_input, normalized_target = self.prenormalize_batch(mix, vocals, [index])
+        return normalized_input[0], normalized_target[0]
+
+    def prenormalize_batch(self, mix, vocals, indices, input=None, target=None):
+        return self.magnitude_batch(mix, indices, input), self.magnitude_batch(vocals, indices, target)
+
+    def run_batch(self, name, mix, vocals, indices, input=None, target=None):
+        """
+        Transforms the windows at `indices` of a song, written into the batches `input` and `target` if given.
+        Transformers without a batched implementation run every window separately.
+        """
+        for i, index in enumerate(indices):
+            x, y = self.run('%s-%i' % (name, index), mix, vocals, index)
+            if input is None:
+                input = np.empty((len(indices),) + np.shape(x), dtype=np.float32)
+                target = np.empty((len(indices),) + np.shape(y), dtype=np.float32)
+            input[i], target[i] = x, y
+        return input, target
+
+    def run_into(self, name, mix, vocals, index, input, target):
+        """
+        Transforms one window into the provided (contiguous) slots of a batch.
+        """
+        self.run_batch(name, mix, vocals, [index], input[np.newaxis], target[np.newaxis])
 
     def prepare_window(self, mix, index):
         """
         Selects one training slice and performs preparation steps for the input (mix).
         """
-        input = [self.chopper.chop_n_pad(mix[0], index, self.size)]
-        if self.stereo:
-            input.append(self.chopper.chop_n_pad(mix[1], index, self.size))
-        normalized = normalizer_real_imag.normalize(input)
-        normalized = np.reshape(
-            normalized, normalized.shape[1:-1] + (2 if self.stereo else 1,))
-        return normalized
+        return self.magnitude_batch(mix, [index])[0]
+
+    def prepare_input_batch(self, mix, indices):
+        """
+        Prepares the inputs (mix) at `indices` as batch, transformers without a batched implementation prepare
+        every window separately.
+        """
+        return np.array([self.prepare_input(mix, index) for index in indices])
 
     def save_audio(self, name, index, mix, vocals, normalized_input, normalized_target):
         spectrogramhandler.to_audio('%s-%d_Reconstructed_Input.wav' % (
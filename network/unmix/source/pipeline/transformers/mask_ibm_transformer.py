@@ -27,28 +27,36 @@ class IBMMaskTransformer(BaseTransformer):
         """
         Returns: (769,size,1), (769,step,1)
         """
-        mix_slice = super().transform_input(mix, index)
-        vocal_slice = super().transform_input(mix, index)
-        instrumental_slice = mix_slice - vocal_slice
-        
-        instrumental_magnitude = np.abs(instrumental_slice)
-        vocal_magnitude = np.abs(vocal_slice)
-
-        target_mask = np.empty_like(instrumental_magnitude)
-        target_mask[instrumental_magnitude <= vocal_magnitude] = 1
-        target_mask[instrumental_magnitude > vocal_magnitude] = 0
-        target_mask = np.resize(target_mask, (769, self.step, 1))
+        input, target = self.run_batch(name, mix, vocals, [index])
+        return input[0], target[0]
+
+    def run_batch(self, name, mix, vocals, indices, input=None, target=None):
+        target_mask = super().mask_batch(mix, vocals, indices, binary=True)
+        mix_magnitude = super().magnitude_batch(mix, indices).reshape(target_mask.shape)
+        # Resized like np.resize per window (truncated or repeated)
+        flat = target_mask.reshape((len(indices), -1))
+        target_mask = np.take(flat, np.arange(769 * self.step) % flat.shape[1], axis=1).reshape(
+            (len(indices), 769, self.step, 1))
 
         if self.save_image:
-            super().save_image(name, index, mix_slice, target_mask)
+            for i, index in enumerate(indices):
+                super().save_image(name, index, mix_magnitude[i], target_mask[i])
 
-        return normalizer_real_imag.normalize(mix_slice), target_mask
+        normalized_input = normalizer_real_imag.normalize(mix_magnitude)
+        if input is None:
+            return normalized_input, target_mask
+        input[...], target[...] = normalized_input, target_mask
+        return input, target
 
     def prepare_input(self, mix, index):
         """
         Selects one training slice and performs preparation steps for the input (mix).
         """
-        input = super().transform_input(mix, index)
+        return self.prepare_input_batch(mix, [index])[0]
+
+    def prepare_input_batch(self, mix, indices):
+        channels = 2 if self.stereo else 1
+        input = super().magnitude_batch(mix, indices).reshape((len(indices), channels, -1, self.size))
         return normalizer_real_imag.normalize(input)
 
     def untransform_target(self, mix, predicted_mask, index):
@@ -13,7 +13,6 @@ import numpy as np
 
 from unmix.source.pipeline.transformers.basetransformer import BaseTransformer
 import unmix.source.pipeline.normalizers.normalizer_real_imag as normalizer_real_imag
-from unmix.source.helpers.masker import mask
 
 
 class MaskTransformer(BaseTransformer):
@@ -26,27 +25,35 @@ class MaskTransformer(BaseTransformer):
 
     def run(self, name, mix, vocals, index):
         """
-        Returns: (769,size,1), (769,step,1)
+        Returns: (channels,769,size,1), (channels,769,size,1)
         """
-        mix_slice = super().transform_input(mix, index)
-        vocal_slice = super().transform_input(mix, index)
-        
-        mix_magnitude = np.abs(mix_slice)
-        vocal_magnitude = np.abs(vocal_slice)
+        input, target = self.run_batch(name, mix, vocals, [index])
+        return input[0], target[0]
 
-        target_mask = mask(vocal_magnitude, mix_magnitude)
+    def run_batch(self, name, mix, vocals, indices, input=None, target=None):
+        target_mask = super().mask_batch(mix, vocals, indices)
+        mix_magnitude = super().magnitude_batch(mix, indices).reshape(target_mask.shape)
 
         if self.save_image:
-            super().save_image(name, index, mix_slice, target_mask)
-            
+            for i, index in enumerate(indices):
+                super().save_image(name, index, mix_magnitude[i], target_mask[i])
+
+        normalized_input = normalizer_real_imag.normalize(mix_magnitude)
         target_mask = np.reshape(target_mask, target_mask.shape + (1,))
-        return normalizer_real_imag.normalize(input), target_mask
+        if input is None:
+            return normalized_input, target_mask
+        input[...], target[...] = normalized_input, target_mask
+        return input, target
 
     def prepare_input(self, mix, index):
         """
         Selects one training slice and performs preparation steps for the input (mix).
         """
-        input = super().transform_input(mix, index)
+        return self.prepare_input_batch(mix, [index])[0]
+
+    def prepare_input_batch(self, mix, indices):
+        channels = 2 if self.stereo else 1
+        input = super().magnitude_batch(mix, indices).reshape((len(indices), channels, -1, self.size))
         return normalizer_real_imag.normalize(input)
 
     def untransform_target(self, mix, predicted_mask, index):
@@ -31,27 +31,35 @@ class TrainWindowPredictMaskTransformer(BaseTransformer):
             self.normalizer = None
 
     def run(self, name, mix, vocals, index):
-        normalized_input, normalized_target = super().prenormalize_window(
-            mix, vocals, index)
+        normalized_input, normalized_target = self.run_batch(name, mix, vocals, [index])
+        return normalized_input[0], normalized_target[0]
+
+    def run_batch(self, name, mix, vocals, indices, input=None, target=None):
+        normalized_input, normalized_target = super().prenormalize_batch(
+            mix, vocals, indices, input, target)
 
         if self.normalizer:
-            normalized_input, normalized_target = self.normalizer.normalize(
+            normalized_input[...], normalized_target[...] = self.normalizer.normalize_batch(
                 normalized_input, normalized_target)
 
         if self.save_audio:
-            super().save_audio(name, index, mix, vocals, normalized_input, normalized_target)
+            for i, index in enumerate(indices):
+                super().save_audio(name, index, mix, vocals, normalized_input[i], normalized_target[i])
         return normalized_input, normalized_target
 
     def prepare_input(self, mix, index):
-        normalized = super().prepare_window(mix, index)
+        return self.prepare_input_batch(mix, [index])[0]
+
+    def prepare_input_batch(self, mix, indices):
+        normalized = super().magnitude_batch(mix, indices)
         if self.normalizer:
-            normalized, _ = self.normalizer.normalize(normalized)
+            normalized[...], _ = self.normalizer.normalize_batch(normalized)
         return normalized
 
     def untransform_target(self, mix, predicted_mask, index):
         'Transforms predicted slices back to a format which corresponds to the training data (ready to process back to audio).'
-        mix_slice = [self.chopper.chop_n_pad(
-            channel, index, self.size) for channel in mix]
+        mix_slice = [self.chopper.chop_many(
+            channel, [index], self.size)[0] for channel in mix]
         mix_magnitude = np.abs(mix_slice)
 
         predicted_mask = np.clip(predicted_mask, 0, 1)
@@ -60,6 +68,6 @@ class TrainWindowPredictMaskTransformer(BaseTransformer):
             predicted_mask_reshape.append(predicted_mask[:, :, 1])
 
         vocal_magnitude = mix_magnitude * predicted_mask_reshape
-        vocals = vocal_magnitude * np.exp(np.angle(mix_slice) * 1j)
+        vocals = vocal_magnitude * self.phase_batch(mix, [index])[0]
 
         return vocals, mix_slice - vocals
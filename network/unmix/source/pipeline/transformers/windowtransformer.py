@@ -21,41 +21,48 @@ class WindowTransformer(BaseTransformer):
     def __init__(self, size, step, shuffle, save_audio):
         super().__init__(size, step, shuffle)
         self.save_audio = save_audio
-
-    def run(self, name, mix, vocals, index):
-        normalized_input, normalized_target = super().prenormalize_window(mix, vocals, index)
         zmuv_normalizer_config = Configuration.get(
             'transformation.normalizers.zmuv')
+        self.mix_normalizer = None
+        self.vocals_normalizer = None
         if zmuv_normalizer_config and zmuv_normalizer_config.enabled:
-            normalized_input = normalizer_zmuv.normalize(
-                normalized_input, zmuv_normalizer_config.mode, zmuv_normalizer_config.mix_file)
-            normalized_target = normalizer_zmuv.normalize(
-                normalized_target, zmuv_normalizer_config.mode, zmuv_normalizer_config.vocals_file)
+            self.mix_normalizer = normalizer_zmuv.load(
+                zmuv_normalizer_config.mode, zmuv_normalizer_config.mix_file)
+            self.vocals_normalizer = normalizer_zmuv.load(
+                zmuv_normalizer_config.mode, zmuv_normalizer_config.vocals_file)
+
+    def run(self, name, mix, vocals, index):
+        normalized_input, normalized_target = self.run_batch(name, mix, vocals, [index])
+        return normalized_input[0], normalized_target[0]
+
+    def run_batch(self, name, mix, vocals, indices, input=None, target=None):
+        normalized_input, normalized_target = super().prenormalize_batch(mix, vocals, indices, input, target)
+        if self.mix_normalizer:
+            self.mix_normalizer.normalize(normalized_input, out=normalized_input)
+            self.vocals_normalizer.normalize(normalized_target, out=normalized_target)
 
         if self.save_audio:
-            super().save_audio(name, index, mix, vocals,
-                             normalized_input, normalized_target)
+            for i, index in enumerate(indices):
+                super().save_audio(name, index, mix, vocals,
+                                   normalized_input[i], normalized_target[i])
         return normalized_input, normalized_target
 
     def prepare_input(self, mix, index):
-        normalized = super().prepare_window(mix, index)
-        zmuv_normalizer_config = Configuration.get(
-            'transformation.normalizers.zmuv')
-        if zmuv_normalizer_config and zmuv_normalizer_config.enabled:
-            normalized = normalizer_zmuv.normalize(
-                normalized, zmuv_normalizer_config.mode, zmuv_normalizer_config.vocals_file)
+        return self.prepare_input_batch(mix, [index])[0]
+
+    def prepare_input_batch(self, mix, indices):
+        normalized = super().magnitude_batch(mix, indices)
+        if self.vocals_normalizer:
+            self.vocals_normalizer.normalize(normalized, out=normalized)
         return normalized
 
     def untransform_target(self, mix, predicted, index):
         'Transforms predicted slices back to a format which corresponds to the training data (ready to process back to audio).'
-        mix_slice = [self.chopper.chop_n_pad(
-            channel, index, self.step) for channel in mix]
+        mix_slice = [self.chopper.chop_many(
+            channel, [index], self.step)[0] for channel in mix]
 
-        zmuv_normalizer_config = Configuration.get(
-            'transformation.normalizers.zmuv')
-        if zmuv_normalizer_config and zmuv_normalizer_config.enabled:
-            predicted = normalizer_zmuv.denormalize(
-                predicted, zmuv_normalizer_config.mode, zmuv_normalizer_config.vocals_file)
+        if self.vocals_normalizer:
+            predicted = self.vocals_normalizer.denormalize(predicted)
 
         denormalized = normalizer_real_imag.denormalize(predicted, mix_slice)
         return denormalized, mix_slice - denormalized
@@ -13,12 +13,13 @@ import glob
 import h5py
 import os
 import math
-import numpy as np
 import progressbar
-import librosa
 
 from unmix.source.prediction.mixprediction import MixPrediction
 from unmix.source.configuration import Configuration
+from unmix.source.data import audio_backend
+from unmix.source.data import spectrogram_generator
+from unmix.source.data import stft_backend
 from unmix.source.data.track import Track
 from unmix.source.exceptions.dataerror import DataError
 from unmix.source.helpers import converter
@@ -36,10 +37,11 @@ class FilePrediction(MixPrediction):
         """
         stereo = Configuration.get('collection.stereo', default=False)
         mono = (not stereo) or remove_panning
-        audio, self.sample_rate_origin = librosa.load(
-            file, mono=mono, sr=self.sample_rate)
-        if isinstance(audio[0], (np.ndarray)):
-            mix = [librosa.stft(audio[0], self.fft_window), librosa.stft(audio[1], self.fft_window)]
+        dtype = spectrogram_generator.complex_type()
+        audio, self.sample_rate_origin = audio_backend.load(
+            file, self.sample_rate, mono=mono, dtype=spectrogram_generator.real_type())
+        if audio.ndim > 1:
+            mix = list(stft_backend.stft(audio[:2], self.fft_window, dtype))
         else:
-            mix = [librosa.stft(audio, self.fft_window)]
+            mix = [stft_backend.stft(audio, self.fft_window, dtype)]
         return super().run(mix, remove_panning=remove_panning)
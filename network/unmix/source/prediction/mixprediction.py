@@ -11,6 +11,7 @@ __email__ = "info@unmix.io"
 import numpy as np
 import progressbar
 
+from unmix.source.configuration import Configuration
 from unmix.source.prediction.prediction import Prediction
 from unmix.source.logging.logger import Logger
 from unmix.source.helpers import spectrogramhandler
@@ -28,12 +29,14 @@ class MixPrediction(Prediction):
             self.mix = np.mean(spectrogramhandler.remove_panning(self.mix), axis=0)
         Logger.info("Start predicting mix.")
         self.length = self.transformer.calculate_items(self.mix[0].shape[1])
+        batch_size = Configuration.get('prediction.batch_size', default=8)
         with progressbar.ProgressBar(max_value=self.length) as progbar:
             self.progressbar = progbar
-            for i in range(self.length):
-                input = self.transformer.prepare_input(
-                    self.mix, i)
-                self.predict_part(i, input)
+            for start in range(0, self.length, batch_size):
+                indices = np.arange(start, min(start + batch_size, self.length))
+                inputs = self.transformer.prepare_input_batch(
+                    self.mix, indices)
+                self.predict_parts(indices, inputs)
                 self.progressbar.update(self.progress)
 
         self.unpad()
@@ -10,9 +10,10 @@ __email__ = "info@unmix.io"
 
 import os
 import numpy as np
-import librosa
 import soundfile as sf
 
+from unmix.source.data import spectrogram_generator
+from unmix.source.data import stft_backend
 from unmix.source.helpers import converter
 from unmix.source.logging.logger import Logger
 
@@ -56,18 +57,25 @@ class Prediction(object):
             output_file = os.path.join(os.path.dirname(file), file_name)
 
         if self.stereo:
-            track = np.array([librosa.istft(channel)
-                              for channel in prediction])
+            track = stft_backend.istft(prediction)
         else:
-            track = librosa.istft(prediction[0])
+            track = stft_backend.istft(prediction[0])
         sf.write(
-            output_file, track, self.sample_rate)
+            output_file, track.T, self.sample_rate)
         Logger.info("Output prediction file: %s" % output_file)
         return output_file
 
     def predict_part(self, i, part):
+        self.predict_parts([i], np.array([part]))
+
+    def predict_parts(self, indices, parts):
+        'Predicts a batch of parts with one model call.'
         with self.graph.as_default():
-            predicted = self.model.predict(np.array([part]))[0]
+            predicted = self.model.predict(parts)
+        for i, prediction in zip(indices, predicted):
+            self.__expand_prediction(i, prediction)
+
+    def __expand_prediction(self, i, predicted):
         predicted_vocals, predicted_instrumental = \
             self.transformer.untransform_target(
                 self.mix, predicted, i)
@@ -93,7 +101,7 @@ class Prediction(object):
 
     def __init_shapes(self, shape):
         self.instrument = np.zeros(
-            (shape[0], shape[1], self.transformer.step * self.length), np.complex)
+            (shape[0], shape[1], self.transformer.step * self.length), spectrogram_generator.complex_type())
         self.rest = np.zeros_like(self.instrument)
         self.initialized = True
 
@@ -15,10 +15,12 @@ import os
 import math
 import numpy as np
 import progressbar
-import librosa
 
 from unmix.source.prediction.prediction import Prediction
 from unmix.source.configuration import Configuration
+from unmix.source.data import audio_backend
+from unmix.source.data import spectrogram_generator
+from unmix.source.data import stft_backend
 from unmix.source.data.track import Track
 from unmix.source.exceptions.dataerror import DataError
 from unmix.source.helpers import converter
@@ -55,9 +57,9 @@ class StreamPrediction(Prediction):
     def __predict_chunk(self, chunk):
         try:
             data = np.nan_to_num(np.fromstring(chunk, dtype=np.float32))
-            audio = librosa.resample(
-                data, self.sample_rate_origin, self.sample_rate)
-            mix = librosa.stft(audio, self.fft_window)
+            audio = audio_backend.resample(
+                data, self.sample_rate_origin, self.sample_rate, audio_backend.resampler())
+            mix = stft_backend.stft(audio, self.fft_window, spectrogram_generator.complex_type())
             if len(self.mix) <= 0:
                 self.mix = mix
             else:
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the song cache shared by data loading processes.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import multiprocessing
+import numpy as np
+
+from unmix.source.data import songfeatures
+from unmix.source.data.sharedsongcache import SharedSongCache, HEADER_SIZE
+
+
+def song(value):
+    return [np.full((10, 10), value, dtype=np.complex64)], [np.full((10, 10), value, dtype=np.complex64)]
+
+
+SONG_BYTES = HEADER_SIZE + 2 * 800
+
+
+def publish(cache, queue):
+    cache.put('/child', song(2))
+    queue.put(cache.statistics())
+
+
+def test_publish_and_map():
+    cache = SharedSongCache(max_bytes=3 * SONG_BYTES)
+    try:
+        mix, instrument = cache.put('/a', song(1))
+        assert not mix[0].flags.writeable
+        assert np.all(instrument[0] == 1)
+
+        queue = multiprocessing.get_context('fork').Queue()
+        process = multiprocessing.get_context('fork').Process(target=publish, args=(cache, queue))
+        process.start()
+        assert queue.get(timeout=30)['items'] == 2
+        process.join()
+
+        mix, instrument = cache.get('/child')
+        assert np.all(mix[0] == 2)
+        assert cache.get('/missing') is None
+        statistics = cache.statistics()
+        assert statistics['hits'] == 1
+        assert statistics['misses'] == 1
+        assert statistics['resident_bytes'] == 2 * SONG_BYTES
+    finally:
+        cache.close()
+
+
+def test_eviction():
+    cache = SharedSongCache(max_bytes=2 * SONG_BYTES, max_attached=1)
+    try:
+        for key in ['/a', '/b', '/c']:
+            cache.put(key, song(0))
+        statistics = cache.statistics()
+        assert statistics['items'] == 2
+        assert statistics['evictions'] == 1
+        assert cache.get('/a') is None
+        assert cache.get('/c') is not None
+        assert cache.put('/large', [[np.zeros((100, 100), dtype=np.complex64)]])[0][0].flags.writeable
+    finally:
+        cache.close()
+
+
+def test_features():
+    cache = SharedSongCache(max_bytes=10 * SONG_BYTES)
+    try:
+        features = [songfeatures.FEATURE_MAGNITUDE, songfeatures.FEATURE_MASK]
+        mix, instrument = cache.put('/a', songfeatures.precompute(song(2), features))
+        assert np.all(mix[0] == 2)
+        assert np.all(songfeatures.get(mix, songfeatures.FEATURE_MAGNITUDE)[0] == 2)
+        assert np.all(songfeatures.get(instrument, songfeatures.FEATURE_MASK)[0] == 1)
+        assert songfeatures.get(instrument, songfeatures.FEATURE_PHASE) is None
+        assert cache.statistics()['resident_bytes'] == SONG_BYTES + 3 * 400
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_publish_and_map()
+    test_eviction()
+    test_features()
+    print("Test run successful.")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the memory budgeted song cache.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import numpy as np
+
+from unmix.source.data.songcache import SongCache, POLICY_COST
+
+
+def song(frames):
+    return [np.zeros((1, 10, frames), dtype=np.complex64)], [np.zeros((1, 10, frames), dtype=np.complex64)]
+
+
+def test_lru_budget():
+    cache = SongCache(max_bytes=3 * 1600)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, song(10))
+    assert cache.resident_bytes == 3 * 1600
+    assert cache.get('a') is not None
+    cache.put('d', song(10))
+    assert 'b' not in cache
+    assert 'a' in cache
+    assert cache.get('b') is None
+    statistics = cache.statistics()
+    assert statistics['hits'] == 1
+    assert statistics['misses'] == 1
+    assert statistics['evictions'] == 1
+    assert statistics['resident_bytes'] == 3 * 1600
+
+
+def test_oversized_and_max_items():
+    cache = SongCache(max_bytes=1000, max_items=2)
+    cache.put('large', song(100))
+    assert 'large' not in cache
+    for key in ['a', 'b', 'c']:
+        cache.put(key, ['lazy'])
+    assert len(cache) == 2
+    assert 'a' not in cache
+
+
+def test_cost_policy():
+    cache = SongCache(max_bytes=3 * 1600, policy=POLICY_COST)
+    cache.put('expensive', song(10), cost=10.0)
+    cache.put('cheap1', song(10), cost=0.1)
+    cache.put('cheap2', song(10), cost=0.1)
+    cache.put('new', song(10), cost=0.1)
+    assert 'expensive' in cache
+    assert len(cache) == 3
+
+
+def test_cost_policy_keeps_long_songs():
+    cache = SongCache(max_bytes=4000, policy=POLICY_COST)
+    cache.put('long', song(20), cost=2.0)
+    cache.put('short', song(5), cost=1.0)
+    cache.put('new', song(5), cost=1.0)
+    # Larger songs are not evicted for their size if they are more expensive to load
+    assert 'long' in cache
+    assert 'short' not in cache
+
+
+if __name__ == "__main__":
+    test_lru_budget()
+    test_oversized_and_max_items()
+    test_cost_policy()
+    test_cost_policy_keeps_long_songs()
+    print("Test run successful.")
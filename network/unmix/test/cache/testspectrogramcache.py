@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the persistent spectrogram cache.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import os
+import tempfile
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import spectrogram_cache
+
+
+def initialize():
+    config_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, create_output=False)
+
+
+def test_key_changes():
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as file:
+        file.write(b'audio')
+    try:
+        key = spectrogram_cache.key(file.name, 22050, 1536, True)
+        assert key == spectrogram_cache.key(file.name, 22050, 1536, True)
+        assert key != spectrogram_cache.key(file.name, 44100, 1536, True)
+        assert key != spectrogram_cache.key(file.name, 22050, 1024, True)
+        assert key != spectrogram_cache.key(file.name, 22050, 1536, False)
+        assert key != spectrogram_cache.key(file.name, 22050, 1536, True, stft='pyfftw-0.13.1')
+        with open(file.name, 'ab') as f:
+            f.write(b'changed')
+        assert key != spectrogram_cache.key(file.name, 22050, 1536, True)
+    finally:
+        os.remove(file.name)
+
+
+def test_save_load():
+    initialize()
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            spectrograms = (np.random.rand(2, 769, 10) + 1j * np.random.rand(2, 769, 10)).astype(np.complex64)
+            assert spectrogram_cache.load('0123') is None
+            spectrogram_cache.save('0123', spectrograms)
+            cached = spectrogram_cache.load('0123')
+            assert isinstance(cached, np.memmap)
+            assert np.array_equal(cached, spectrograms)
+            del cached
+        finally:
+            os.chdir(working_directory)
+
+
+if __name__ == "__main__":
+    test_key_changes()
+    test_save_load()
+    print("Test run successful.")
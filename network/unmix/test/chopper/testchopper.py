@@ -90,6 +90,50 @@ def test_end_of_the_world():
     assert chop.shape[1] == 1
 
 
+def test_chop_many():
+    for step, size, width in [(64, 64, 1000), (10, 10, 10), (7, 5, 9), (32, 64, 100), (3, 8, 2)]:
+        input = np.random.randn(20, width)
+        chopper = Chopper(step)
+        count = chopper.calculate_chops(width, size)
+        chops = chopper.chop_all(input, size)
+        assert chops.shape == (count, 20, size)
+        for index in range(count):
+            assert np.array_equal(chops[index], chopper.chop_n_pad(input, index, size))
+        indices = [count - 1, 0, count // 2, count - 1]
+        chops = chopper.chop_many(input, indices, size)
+        for i, index in enumerate(indices):
+            assert np.array_equal(chops[i], chopper.chop_n_pad(input, index, size))
+    assert Chopper(10).chop_many(np.ones((5, 20)), [], 10).shape == (0, 5, 10)
+
+
+class LazyInput(object):
+    'Records the frames read from the input.'
+
+    def __init__(self, input):
+        self.input = input
+        self.shape = input.shape
+        self.dtype = input.dtype
+        self.frames = 0
+
+    def __getitem__(self, key):
+        chunk = self.input[key]
+        self.frames += chunk.shape[1]
+        return chunk
+
+
+def test_chop_many_scattered():
+    step, size = 16, 64
+    input = np.random.randn(20, 10000)
+    chopper = Chopper(step)
+    indices = [600, 3, 601, 2, 300, 3]
+    for data in [input, LazyInput(input)]:
+        chops = chopper.chop_many(data, indices, size)
+        for i, index in enumerate(indices):
+            assert np.array_equal(chops[i], chopper.chop_n_pad(input, index, size))
+    # Only the frames covered by runs of overlapping windows are read
+    assert data.frames <= 3 * (size + step)
+
+
 if __name__ == "__main__":
     test_end_of_the_world()
     test_start()
@@ -98,5 +142,7 @@ if __name__ == "__main__":
     test_middle()
     test_lengths()
     test_chopping()
+    test_chop_many()
+    test_chop_many_scattered()
 
     print("Test run successful.")
@@ -39,6 +39,19 @@ def test_configuration_initialize():
         assert True
 
 
+def test_configuration_overrides():
+    current_path = os.path.dirname(__file__)
+    config_file = os.path.join(os.path.dirname(__file__), 'test.jsonc')
+    Configuration.initialize(config_file, current_path, create_output=False,
+                             overrides={'test': 'override', 'level1': {'level2': {'added': 1}}})
+    assert Configuration.get("test") == "override"
+    assert Configuration.get("level1.level2.level3") == "test-level3"
+    assert Configuration.get("level1.level2.added") == 1
+    Configuration.initialize(config_file, current_path, create_output=False)
+    assert Configuration.get("test") == "test-root"
+
+
 if __name__ == "__main__":
     test_configuration_initialize()
+    test_configuration_overrides()
     print("Test run successful.")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests decoding and resampling audio files.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import os
+import tempfile
+import librosa
+import numpy as np
+import soundfile
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import audio_backend
+
+
+def initialize():
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, os.path.dirname(__file__), create_output=False)
+
+
+def write_audio(folder, frames, channels, sample_rate):
+    file = os.path.join(folder, 'audio_%d_%d_%d.wav' % (frames, channels, sample_rate))
+    audio = np.random.uniform(-0.5, 0.5, (frames, channels)).astype(np.float32)
+    soundfile.write(file, audio, sample_rate, subtype='FLOAT')
+    return file
+
+
+def test_decode_like_librosa():
+    initialize()
+    with tempfile.TemporaryDirectory() as folder:
+        for frames, channels in [(22050, 1), (22050 + 100, 2)]:
+            file = write_audio(folder, frames, channels, 22050)
+            for mono in [True, False]:
+                expected, _ = librosa.load(file, sr=22050, mono=mono)
+                for block_frames in [0, 1000]:
+                    audio = audio_backend.decode(file, mono, block_frames=block_frames)[0]
+                    assert np.array_equal(audio[0] if expected.ndim == 1 else audio, expected)
+                audio, sample_rate = audio_backend.load(file, 22050, mono=mono)
+                assert sample_rate == 22050
+                assert np.array_equal(audio, expected)
+
+
+def test_resample():
+    initialize()
+    with tempfile.TemporaryDirectory() as folder:
+        file = write_audio(folder, 44100, 2, 44100)
+        expected, _ = librosa.load(file, sr=22050, mono=False)
+        audio, sample_rate = audio_backend.load(file, 22050, mono=False)
+        assert sample_rate == 22050
+        assert np.array_equal(audio, expected)
+
+        resampled = audio_backend.resample(audio, 22050, 44100, audio_backend.RESAMPLER_POLY)
+        assert resampled.shape == (2, 44100)
+        assert resampled.dtype == np.float32
+        assert audio_backend.resample(audio, 22050, 22050) is audio
+
+
+if __name__ == "__main__":
+    test_decode_like_librosa()
+    test_resample()
+    print("Test run successful.")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests reading spectrogram frame ranges from partially decoded audio.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import os
+import tempfile
+import librosa
+import numpy as np
+import soundfile
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import stft_backend
+from unmix.source.data.audiorange import AudioRange
+from unmix.source.pipeline.choppers.chopper import Chopper
+
+
+def initialize():
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, os.path.dirname(__file__), create_output=False)
+
+
+def write_audio(folder, frames, channels):
+    file = os.path.join(folder, 'audio_%d_%d.wav' % (frames, channels))
+    audio = np.random.uniform(-0.5, 0.5, (frames, channels)).astype(np.float32)
+    soundfile.write(file, audio, 22050, subtype='FLOAT')
+    return file
+
+
+def full_spectrograms(file, mono, fft_length):
+    audio, _ = librosa.load(file, sr=22050, mono=mono)
+    if audio.ndim == 1:
+        audio = [audio]
+    return list(stft_backend.stft(audio[:2], fft_length))
+
+
+def test_ranges():
+    initialize()
+    with tempfile.TemporaryDirectory() as folder:
+        for frames, channels, mono in [(22050, 1, True), (22050 + 100, 2, False), (22050 + 384, 2, True)]:
+            file = write_audio(folder, frames, channels)
+            audio_range = AudioRange(file, 1536, 22050, mono)
+            spectrograms = full_spectrograms(file, mono, 1536)
+            assert audio_range.width == spectrograms[0].shape[1]
+            width = audio_range.width
+            for start, end in [(0, 1), (0, 10), (3, 17), (width - 5, width), (width - 1, width), (0, width)]:
+                window = audio_range.read(start, end)
+                assert window.shape[0] == len(spectrograms)
+                for channel, spectrogram in enumerate(spectrograms):
+                    assert np.array_equal(window[channel], spectrogram[:, start:end])
+
+
+def test_chopped_windows():
+    initialize()
+    with tempfile.TemporaryDirectory() as folder:
+        file = write_audio(folder, 22050 * 2, 2)
+        audio_range = AudioRange(file, 1536, 22050, False)
+        spectrograms = full_spectrograms(file, False, 1536)
+        chopper = Chopper(16)
+        for index in range(chopper.calculate_chops(audio_range.width, 16)):
+            start = max(0, 16 * index - 8)
+            end = min(audio_range.width, start + 16)
+            window = audio_range.read(start, end)
+            assert np.array_equal(window[1], spectrograms[1][:, start:end])
+
+
+if __name__ == "__main__":
+    test_ranges()
+    test_chopped_windows()
+    print("Test run successful.")
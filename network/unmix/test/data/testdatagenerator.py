@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the windows drawn by the data generator.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import os
+import tempfile
+import numpy as np
+import soundfile
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import batchitem
+from unmix.source.data.datagenerator import DataGenerator, SAMPLER_INFINITE, SAMPLER_WINDOW
+from unmix.source.pipeline.transformers.train_window_predict_mask_transformer import TrainWindowPredictMaskTransformer
+
+
+class Engine(object):
+    test_songs = None
+
+
+def create_collection(folder, count=3):
+    songs = []
+    for song in range(count):
+        song_folder = os.path.join(folder, 'song%d' % song)
+        os.makedirs(song_folder)
+        for name in ['instrument_song.wav', 'rest_song.wav']:
+            audio = np.random.uniform(-0.5, 0.5, (22050 * (song + 1), 1)).astype(np.float32)
+            soundfile.write(os.path.join(song_folder, name), audio, 22050, subtype='FLOAT')
+        songs.append(song_folder)
+    return songs
+
+
+def initialize(folder, training=None):
+    os.environ.setdefault('UNMIX_SAMPLE_RATE', '22050')
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, os.path.dirname(__file__), create_output=False, overrides={
+        'collection': {'sample_rate': 22050, 'index': {'folder': os.path.join(folder, 'index')}},
+        'training': dict({'batch_size': 4, 'limit_items_per_song': 0, 'epoch': {'sampler': SAMPLER_INFINITE}},
+                         **(training or {}))
+    })
+    batchitem.cache = None
+
+
+def test_infinite_validation_windows():
+    with tempfile.TemporaryDirectory() as folder:
+        initialize(folder)
+        songs = create_collection(folder)
+        transformer = TrainWindowPredictMaskTransformer(64, 16, False, False, None)
+        validation = DataGenerator('validation', Engine(), songs, transformer, steps=5)
+        training = DataGenerator('training', Engine(), songs, transformer, augment=True, steps=5)
+        assert len(validation) == len(training) == 5
+
+        validation_subsets = [validation.subset(i) for i in range(5)]
+        training_subsets = [training.subset(i) for i in range(5)]
+        validation.on_epoch_end()
+        training.on_epoch_end()
+        # Validation covers the same windows in every epoch, training draws new windows
+        assert all(np.array_equal(subset, validation.subset(i)) for i, subset in enumerate(validation_subsets))
+        assert not all(np.array_equal(subset, training.subset(i)) for i, subset in enumerate(training_subsets))
+
+
+def test_end_epoch():
+    with tempfile.TemporaryDirectory() as folder:
+        initialize(folder, {'epoch': {'sampler': SAMPLER_WINDOW, 'shuffle': True}})
+        songs = create_collection(folder)
+        transformer = TrainWindowPredictMaskTransformer(64, 16, False, False, None)
+        generator = DataGenerator('training', Engine(), songs, transformer, augment=True)
+        index = generator.index
+        # Datasets end epochs without regenerating the index of the generator
+        generator.end_epoch()
+        assert generator.index is index and generator.count == 2
+        generator.on_epoch_end()
+        assert generator.index is not index and generator.count == 3
+
+
+def test_remix():
+    with tempfile.TemporaryDirectory() as folder:
+        # Without song cache only songs of the batch can be partners
+        initialize(folder, {'cache': {'max_bytes': 0}, 'augmentation': {'remix': {'probability': 1.0}}})
+        songs = create_collection(folder)
+        transformer = TrainWindowPredictMaskTransformer(64, 16, False, False, None)
+        generator = DataGenerator('training', Engine(), songs, transformer, augment=True, steps=5)
+        load_song = batchitem.load_song
+        loaded = []
+        batchitem.load_song = lambda file: loaded.append(file) or load_song(file)
+        try:
+            for i in range(len(generator)):
+                del loaded[:]
+                # Remixes only depend on seed and batch, not on the global random state of a worker
+                np.random.seed(i)
+                x, y = [np.array(data) for data in generator[i]]
+                np.random.seed(i + 1)
+                assert all(np.array_equal(a, b) for a, b in zip((x, y), generator[i]))
+                assert sorted(loaded) == sorted(2 * [songs[song] for song in np.unique(generator.subset(i)['song'])])
+        finally:
+            batchitem.load_song = load_song
+        assert generator.remixes > 0
+
+
+if __name__ == "__main__":
+    test_infinite_validation_windows()
+    test_end_epoch()
+    test_remix()
+    print("Test run successful.")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the manifest of song folders against the recursive glob of a collection.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import json
+import os
+import tempfile
+
+from unmix.source.data import manifest
+from unmix.source.data.dataloader import DataLoader
+
+
+def touch(folder, *names):
+    os.makedirs(folder, exist_ok=True)
+    for name in names:
+        open(os.path.join(folder, name), 'w').close()
+
+
+def settle(root):
+    # Directories modified just now are always read again
+    for folder, _, _ in os.walk(root):
+        os.utime(folder, ns=(0, 10 ** 18))
+
+
+def create_collection(root):
+    touch(os.path.join(root, 'a'), 'instrument_a.wav', 'rest_a.wav')
+    touch(os.path.join(root, 'b', 'c'), 'instrument_c.wav', 'rest_c.wav', 'mix_c.wav')
+    touch(os.path.join(root, 'b', 'd'), 'instrument_d.wav')
+    touch(os.path.join(root, 'e'), 'rest_e.wav', 'rest_f.wav', 'instrument_e.wav')
+    touch(os.path.join(root, '.hidden'), 'instrument_h.wav', 'rest_h.wav')
+
+
+def test_same_songs_as_glob():
+    with tempfile.TemporaryDirectory() as folder:
+        root = os.path.join(folder, 'collection')
+        create_collection(root)
+        file = os.path.join(folder, 'manifest.json')
+        songs, incomplete = manifest.songs(root, manifest.scan(root, file))
+        assert (songs, incomplete) == DataLoader.globFiles(root)
+        assert len(songs) == 3 and incomplete == 1
+        assert os.path.exists(file)
+
+
+def test_incremental_rescan():
+    with tempfile.TemporaryDirectory() as folder:
+        root = os.path.join(folder, 'collection')
+        create_collection(root)
+        settle(root)
+        file = os.path.join(folder, 'manifest.json')
+        manifest.scan(root, file)
+
+        # Unchanged directories are taken from the manifest without listing them
+        with open(file, 'r') as f:
+            content = json.load(f)
+        content['directories']['a']['stems'] = {}
+        del content['directories']['a']['order']
+        with open(file, 'w') as f:
+            json.dump(content, f)
+        touch(os.path.join(root, 'b', 'g'), 'instrument_g.wav', 'rest_g.wav')
+        songs, _ = manifest.songs(root, manifest.scan(root, file))
+        assert sorted(os.path.basename(song) for song in songs) == ['c', 'e', 'g']
+
+
+if __name__ == "__main__":
+    test_same_songs_as_glob()
+    test_incremental_rescan()
+    print("Test run successful.")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests remixing windows of songs in the STFT domain.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import numpy as np
+
+from unmix.source.data import remix
+from unmix.source.pipeline.choppers.chopper import Chopper
+
+
+def create_song(width, channels=2):
+    mix = [(np.random.randn(9, width) + 1j * np.random.randn(9, width)).astype(np.complex64) for _ in range(channels)]
+    instrument = [(np.random.randn(9, width) + 1j * np.random.randn(9, width)).astype(np.complex64)
+                  for _ in range(channels)]
+    return mix, instrument
+
+
+def test_remix():
+    step, size = 4, 16
+    chopper = Chopper(step)
+    song, partner = create_song(100), create_song(120)
+    gains, offset = (0.5, 2.0), 13
+    for windows in [np.array([0, 1]), np.array([7, 5, 9]), np.arange(chopper.calculate_chops(100, size))]:
+        (mix, instrument), remixed_windows = remix.remix(song, partner, windows, step, size, gains, offset)
+        _, start, end = remix.frame_range(windows, step, size, 100)
+        assert mix[0].shape == (9, end - start)
+        for channel in range(2):
+            # Remix of the complete songs, shifted by the offset of the rest
+            expected_instrument = song[1][channel] * gains[0]
+            rest = partner[0][channel] - partner[1][channel]
+            expected_mix = expected_instrument.copy()
+            expected_mix[:, start:end] += gains[1] * rest[:, offset:offset + end - start]
+            assert np.allclose(chopper.chop_many(mix[channel], remixed_windows, size),
+                               chopper.chop_many(expected_mix, windows, size))
+            assert np.allclose(chopper.chop_many(instrument[channel], remixed_windows, size),
+                               chopper.chop_many(expected_instrument, windows, size))
+
+
+def test_scattered_windows():
+    step, size = 4, 16
+    chopper = Chopper(step)
+    song = create_song(100)
+    gains = (0.5, 2.0)
+    for windows, partner, offset in [(np.array([26, 2, 3, 14, 26, 3]), create_song(120), 13),
+                                     (np.array([0, 20, 8]), create_song(30), 0)]:
+        (mix, instrument), remixed_windows = remix.remix(song, partner, windows, step, size, gains, offset)
+        # Only the frames covered by the runs of overlapping windows are remixed
+        assert mix[0].shape[1] <= len(remix.runs(windows, step, size)) * (size + step)
+        _, start, end = remix.frame_range(windows, step, size, 100)
+        length = min(end - start, partner[0][0].shape[1] - offset)
+        for channel in range(2):
+            expected_instrument = song[1][channel] * gains[0]
+            rest = (partner[0][channel] - partner[1][channel])[:, offset:offset + length]
+            expected_mix = expected_instrument.copy()
+            expected_mix[:, start:end] += gains[1] * np.take(rest, np.arange(end - start) % length, axis=1)
+            assert np.allclose(chopper.chop_many(mix[channel], remixed_windows, size),
+                               chopper.chop_many(expected_mix, windows, size))
+            assert np.allclose(chopper.chop_many(instrument[channel], remixed_windows, size),
+                               chopper.chop_many(expected_instrument, windows, size))
+
+
+def test_short_partner():
+    song, partner = create_song(100, 1), create_song(10, 1)
+    (mix, instrument), windows = remix.augment(song, partner, np.arange(20), 4, 16)
+    assert mix[0].shape == instrument[0].shape == (9, 84)
+    rest = mix[0] - instrument[0]
+    assert np.allclose(rest[:, :10] / rest[:, 10:20], rest[0, 0] / rest[0, 10])
+    assert windows.tolist() == list(range(20))
+
+
+if __name__ == "__main__":
+    test_remix()
+    test_scattered_windows()
+    test_short_partner()
+    print("Test run successful.")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests sharding songs between training workers and reducing their metrics.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import tempfile
+from multiprocessing.pool import ThreadPool
+
+from unmix.source.data import sharding
+
+
+def test_shard():
+    files = ['song%d' % i for i in range(11)]
+    shards = [sharding.shard(files, rank, 3) for rank in range(3)]
+    assert sorted(sum(shards, [])) == sorted(files)
+    assert [len(shard) for shard in shards] == [4, 4, 3]
+    assert shards[1] == sharding.shard(list(files), 1, 3)
+    assert sharding.shard(files, 0, 1) == files
+
+
+def test_reduce():
+    with tempfile.TemporaryDirectory() as folder:
+        def worker(rank):
+            metrics = {'val_loss': float(rank + 1), 'val_mean_pred': 0.5}
+            return sharding.reduce(folder, 3, metrics, [10, 30, 0][rank], rank, 3, timeout=10)
+
+        with ThreadPool(3) as pool:
+            results = pool.map(worker, range(3))
+        for result in results:
+            assert result == {'val_loss': (1 * 10 + 2 * 30) / 40, 'val_mean_pred': 0.5}
+
+
+if __name__ == "__main__":
+    test_shard()
+    test_reduce()
+    print("Test run successful.")
@@ -9,10 +9,15 @@ __author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
 __email__ = "info@unmix.io"
 
 
+import os
+import tempfile
 import numpy as np
+import soundfile
 
+from unmix.source.configuration import Configuration
 from unmix.source.pipeline.choppers.chopper import Chopper
 import unmix.source.helpers.reducer as reducer
+from unmix.source.data import track
 from unmix.source.data.song import Song
 
 
@@ -43,7 +48,33 @@ def test_load_chopper_horizontal_song_mono():
     assert not np.array_equal(mix, vocals)
 
 
+def test_lazy_song():
+    os.environ.setdefault('UNMIX_SAMPLE_RATE', '22050')
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, os.path.dirname(__file__), create_output=False)
+    generate_spectrogram = track.generate_spectrogram
+    generated = []
+    track.generate_spectrogram = lambda file: generated.append(file) or generate_spectrogram(file)
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            song_folder = os.path.join(folder, 'song')
+            os.makedirs(song_folder)
+            for name, frames in [('instrument_song.wav', 88200), ('rest_song.wav', 88200 + 500)]:
+                audio = np.random.uniform(-0.5, 0.5, (frames, 1)).astype(np.float32)
+                soundfile.write(os.path.join(song_folder, name), audio, 44100, subtype='FLOAT')
+            song = Song(song_folder)
+            assert not generated
+            assert song.name == 'song'
+            width = song.width
+            mix, vocals = song.load()
+            assert len(generated) == 2
+            assert mix[0].shape == vocals[0].shape == (song.height, width)
+    finally:
+        track.generate_spectrogram = generate_spectrogram
+
+
 if __name__ == "__main__":
     test_load_song_mono()
     test_load_chopper_horizontal_song_mono()
+    test_lazy_song()
     print("Test run successful.")
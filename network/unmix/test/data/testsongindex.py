@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the song index derived from audio headers.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import librosa
+import numpy as np
+
+from unmix.source.data.songindex import calculate_width
+
+
+def test_width_matches_stft():
+    for frames in [1536, 22050, 22051, 22050 * 3 + 17]:
+        spectrogram = librosa.stft(np.zeros(frames, dtype=np.float32), n_fft=1536)
+        assert calculate_width(frames, 22050, 22050, 1536) == spectrogram.shape[1]
+
+
+def test_width_matches_resampled_stft():
+    for frames in [44100, 44101, 44100 * 2 + 33]:
+        audio = librosa.resample(np.zeros(frames, dtype=np.float32), orig_sr=44100, target_sr=22050)
+        spectrogram = librosa.stft(audio, n_fft=1536)
+        assert calculate_width(frames, 44100, 22050, 1536) == spectrogram.shape[1]
+
+
+if __name__ == "__main__":
+    test_width_matches_stft()
+    test_width_matches_resampled_stft()
+    print("Test run successful.")
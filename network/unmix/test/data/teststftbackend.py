@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the STFT and ISTFT of many channels against librosa.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import os
+import librosa
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import stft_backend
+
+
+def initialize():
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, os.path.dirname(__file__), create_output=False)
+
+
+def test_stft():
+    initialize()
+    for samples in [1536, 22050 + 100]:
+        audio = np.random.uniform(-0.5, 0.5, (2, samples)).astype(np.float32)
+        for dtype in [np.complex64, np.complex128]:
+            spectrograms = stft_backend.stft(audio, 1536, dtype)
+            assert spectrograms.dtype == dtype
+            for channel in range(2):
+                expected = librosa.stft(audio[channel], n_fft=1536, dtype=dtype)
+                assert spectrograms[channel].shape == expected.shape
+                assert np.allclose(spectrograms[channel], expected, atol=1e-5)
+        assert np.array_equal(stft_backend.stft(audio[0], 1536), stft_backend.stft(audio, 1536)[0])
+
+
+def test_istft():
+    initialize()
+    audio = np.random.uniform(-0.5, 0.5, (2, 22050 + 100)).astype(np.float32)
+    spectrograms = np.array([librosa.stft(channel, n_fft=1536) for channel in audio])
+    restored = stft_backend.istft(spectrograms)
+    assert restored.dtype == np.float32
+    for channel in range(2):
+        expected = librosa.istft(spectrograms[channel])
+        assert restored[channel].shape == expected.shape
+        assert np.allclose(restored[channel], expected, atol=1e-5)
+    assert np.allclose(restored, audio[:, :restored.shape[1]], atol=1e-5)
+
+
+if __name__ == "__main__":
+    test_stft()
+    test_istft()
+    print("Test run successful.")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the tf.data pipeline of the data generator.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import tempfile
+import numpy as np
+
+from unmix.source.data import tfdataset
+from unmix.source.data.datagenerator import DataGenerator, SAMPLER_WINDOW
+from unmix.source.pipeline.transformers.train_window_predict_mask_transformer import TrainWindowPredictMaskTransformer
+from unmix.test.data.testdatagenerator import Engine, create_collection, initialize
+
+
+def dataset_windows(dataset):
+    'Returns the sorted (song, window) pairs of an epoch.'
+    return sorted((int(song), int(window)) for x, y in dataset.as_numpy_iterator() for song, window in zip(x, y))
+
+
+def test_limited_windows():
+    with tempfile.TemporaryDirectory() as folder:
+        initialize(folder, {'batch_size': 3, 'limit_items_per_song': 3, 'epoch': {'sampler': SAMPLER_WINDOW}})
+        songs = create_collection(folder)
+        for shuffle in [False, True]:
+            transformer = TrainWindowPredictMaskTransformer(64, 16, shuffle, False, None)
+            generator = DataGenerator('training', Engine(), songs, transformer)
+            # Windows are identified by their song and number instead of being loaded
+            generator.load_window = lambda song, window: (np.float32(song), np.float32(window))
+            dataset = tfdataset.build(generator, shuffle=True)
+            epochs = [dataset_windows(dataset) for _ in range(5)]
+            for windows in epochs:
+                assert [song for song, _ in windows] == [song for song in range(len(songs)) for _ in range(3)]
+            if shuffle:
+                # Random windows per epoch as the index of the data generator
+                assert any(windows != epochs[0] for windows in epochs[1:])
+            else:
+                # Middle windows of every song
+                assert all(windows == sorted((int(entry['song']), int(entry['window'])) for entry in generator.index)
+                           for windows in epochs)
+
+
+if __name__ == "__main__":
+    test_limited_windows()
+    print("Test run successful.")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests the array based window index.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import numpy as np
+
+from unmix.source.data import windowindex
+
+
+def limit_items_of_song(items, limit):
+    middle = len(items) / 2
+    limit_half = limit / 2
+    start = int(max(0, middle - limit_half))
+    end = int(min(len(items), start + limit))
+    return items[start:end]
+
+
+def test_build():
+    index = windowindex.build([3, 0, 2])
+    assert index.dtype == windowindex.INDEX_TYPE
+    assert index['song'].tolist() == [0, 0, 0, 2, 2]
+    assert index['window'].tolist() == [0, 1, 2, 0, 1]
+
+
+def test_build_shuffle():
+    counts = [10, 5, 7]
+    index = windowindex.build(counts, shuffle=True)
+    assert index['song'].tolist() == sorted(index['song'].tolist())
+    for song, count in enumerate(counts):
+        assert sorted(index['window'][index['song'] == song].tolist()) == list(range(count))
+
+
+def test_build_limit():
+    counts = [10, 5, 7, 1, 0]
+    for limit in [1, 2, 3, 4.5, 6, 20]:
+        index = windowindex.build(counts, limit=limit)
+        for song, count in enumerate(counts):
+            expected = limit_items_of_song(list(range(count)), limit)
+            assert index['window'][index['song'] == song].tolist() == expected
+
+
+def test_shuffle_in_pools():
+    counts = [10, 5, 7, 3, 12, 1, 8]
+    index = windowindex.build(counts)
+    shuffled = windowindex.shuffle_in_pools(index, 3)
+    assert sorted(shuffled.tolist()) == sorted(index.tolist())
+    # Every song appears in exactly one contiguous pool of at most three songs
+    pools = []
+    for position in range(0, len(shuffled)):
+        song = shuffled['song'][position]
+        if not pools or (song not in pools[-1] and len(pools[-1]) == 3):
+            pools.append(set())
+        pools[-1].add(song)
+    assert len(pools) == 3
+    assert sum(len(pool) for pool in pools) == len(counts)
+
+
+def test_sample():
+    counts = [10, 0, 5, 7]
+    starts, offsets = windowindex.offsets(counts, limit=4)
+    valid = set(map(tuple, windowindex.build(counts, limit=4).tolist()))
+    index = windowindex.sample(starts, offsets, 10000, np.random.default_rng(0))
+    assert index.dtype == windowindex.INDEX_TYPE
+    assert index['song'].tolist() == sorted(index['song'].tolist())
+    assert set(map(tuple, index.tolist())) == valid
+    assert np.array_equal(index, windowindex.sample(starts, offsets, 10000, np.random.default_rng(0)))
+
+
+if __name__ == "__main__":
+    test_build()
+    test_build_shuffle()
+    test_build_limit()
+    test_shuffle_in_pools()
+    test_sample()
+    print("Test run successful.")
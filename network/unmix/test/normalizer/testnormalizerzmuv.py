@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests of the zero mean unit variance normalizer.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import json
+import os
+import tempfile
+import numpy as np
+
+from unmix.source.pipeline.normalizers import normalizer_zmuv
+
+
+def write_statistics(folder, height, channels):
+    file = os.path.join(folder, 'statistics_%d_%d.json' % (height, channels))
+    statistics = {
+        'mean': 2.0,
+        'variance': 4.0,
+        'bin_mean': np.random.uniform(0, 1, height * channels).tolist(),
+        'bin_variance': np.random.uniform(1, 2, height * channels).tolist()
+    }
+    with open(file, 'w') as f:
+        json.dump(statistics, f)
+    return file, statistics
+
+
+def test_normalize():
+    with tempfile.TemporaryDirectory() as folder:
+        for channels in [1, 2]:
+            file, statistics = write_statistics(folder, 769, channels)
+            window = np.random.uniform(0, 10, (769, 64, channels)).astype(np.float32)
+
+            normalized = normalizer_zmuv.normalize(window, normalizer_zmuv.MODE_SINGLE, file)
+            assert np.allclose(normalized, (window - 2.0) / 2.0)
+
+            # Statistics per bin as repeated by the previous implementation
+            mean = np.repeat(np.reshape(statistics['bin_mean'], (769, 1, channels)), 64, axis=1)
+            variance = np.repeat(np.reshape(statistics['bin_variance'], (769, 1, channels)), 64, axis=1)
+            normalized = normalizer_zmuv.normalize(window, normalizer_zmuv.MODE_BIN, file)
+            assert np.allclose(normalized, (window - mean) / np.sqrt(variance), atol=1e-5)
+            assert np.allclose(normalizer_zmuv.denormalize(normalized, normalizer_zmuv.MODE_BIN, file), window,
+                               atol=1e-5)
+
+            # Batches are normalized in place
+            normalizer = normalizer_zmuv.load(normalizer_zmuv.MODE_BIN, file)
+            assert normalizer is normalizer_zmuv.load(normalizer_zmuv.MODE_BIN, file)
+            batch = np.array([window, window])
+            assert normalizer.normalize(batch, out=batch) is batch
+            assert np.allclose(batch[1], normalized)
+
+
+if __name__ == "__main__":
+    test_normalize()
+    print("Test run successful.")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests merging partial statistics of the zmuv normalizer.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import numpy as np
+
+from unmix.source.helpers import statisticshelper
+
+
+def test_merge():
+    songs = [np.random.uniform(0, 10, (2, 20, width)) for width in [5, 17, 1, 40]]
+    statistics = (0, 0.0, 0.0)
+    for song in songs:
+        statistics = statisticshelper.merge(statistics, statisticshelper.calculate(song))
+    result = statisticshelper.finalize(statistics)
+
+    magnitudes = np.concatenate(songs, axis=2)
+    assert result['count'] == magnitudes.shape[2]
+    assert np.isclose(result['mean'], np.mean(magnitudes))
+    assert np.isclose(result['variance'], np.var(magnitudes))
+    assert np.allclose(np.array(result['bin_mean']).T, np.mean(magnitudes, axis=2))
+    assert np.allclose(np.array(result['bin_variance']).T, np.var(magnitudes, axis=2))
+
+
+if __name__ == "__main__":
+    test_merge()
+    print("Test run successful.")
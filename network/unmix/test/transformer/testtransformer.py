@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# coding: utf8
+
+"""
+Tests transforming batches of windows.
+"""
+
+__author__ = 'David Flury, Andreas Kaufmann, Raphael Müller'
+__email__ = "info@unmix.io"
+
+
+import os
+import numpy as np
+
+from unmix.source.configuration import Configuration
+from unmix.source.data import songfeatures
+from unmix.source.helpers import masker
+from unmix.source.pipeline.transformers.mask_ibm_transformer import IBMMaskTransformer
+from unmix.source.pipeline.transformers.masktransformer import MaskTransformer
+from unmix.source.pipeline.transformers.windowtransformer import WindowTransformer
+from unmix.source.pipeline.transformers.train_window_predict_mask_transformer import TrainWindowPredictMaskTransformer
+
+
+def initialize():
+    config_file = os.path.join(os.path.dirname(__file__), '..', 'configuration', 'test.jsonc')
+    Configuration.initialize(config_file, os.path.dirname(__file__), create_output=False)
+
+
+def spectrogram(channels, width=100):
+    return [(np.random.randn(769, width) + 1j * np.random.randn(769, width)).astype(np.complex64)
+            for _ in range(channels)]
+
+
+def transformers():
+    return [WindowTransformer(64, 32, False, False),
+            TrainWindowPredictMaskTransformer(64, 32, False, False, 'norm_max'),
+            TrainWindowPredictMaskTransformer(64, 32, False, False, 'norm_min_max')]
+
+
+def test_run_into():
+    initialize()
+    for transformer in transformers():
+        for stereo in [False, True]:
+            transformer.stereo = stereo
+            mix = spectrogram(2 if stereo else 1)
+            vocals = spectrogram(2 if stereo else 1)
+            for index in range(transformer.calculate_items(100)):
+                input, target = transformer.run('test', mix, vocals, index)
+                batch = np.zeros((2,) + input.shape, dtype=np.float32), np.zeros((2,) + target.shape, dtype=np.float32)
+                transformer.run_into('test', mix, vocals, index, batch[0][1], batch[1][1])
+                assert np.array_equal(batch[0][1], input)
+                assert np.array_equal(batch[1][1], target)
+                assert not np.any(batch[0][0])
+
+
+def test_run_batch():
+    initialize()
+    for transformer in transformers():
+        for stereo in [False, True]:
+            transformer.stereo = stereo
+            mix = spectrogram(2 if stereo else 1)
+            vocals = spectrogram(2 if stereo else 1)
+            indices = [3, 0, 1, 2, transformer.calculate_items(100) - 1]
+            input, target = transformer.run_batch('test', mix, vocals, indices)
+            prepared = transformer.prepare_input_batch(mix, indices)
+            assert input.shape == (len(indices), 769, 64, 2 if stereo else 1)
+            for i, index in enumerate(indices):
+                single_input, single_target = transformer.run('test', mix, vocals, index)
+                assert np.array_equal(input[i], single_input)
+                assert np.array_equal(target[i], single_target)
+                assert np.array_equal(prepared[i], transformer.prepare_input(mix, index))
+
+            # Same as the previous single window implementation
+            window = [np.abs(transformer.chopper.chop_n_pad(channel, 2, 64)) for channel in mix]
+            window = np.reshape(window, (769, 64, 2 if stereo else 1))
+            expected, _ = transformer.normalizer.normalize(window) if hasattr(transformer, 'normalizer') \
+                else (window, None)
+            assert np.allclose(input[3], expected)
+
+
+def test_precomputed_features():
+    initialize()
+    for transformer in transformers() + [MaskTransformer(64, 32, False, False)]:
+        for stereo in [False, True]:
+            transformer.stereo = stereo
+            mix = spectrogram(2 if stereo else 1)
+            vocals = spectrogram(2 if stereo else 1)
+            mix[0][:, :10] = 0
+            vocals[0][:, 5:15] = 0
+            precomputed_mix, precomputed_vocals = songfeatures.precompute((mix, vocals), songfeatures.FEATURES)
+            indices = [0, 2, 1, transformer.calculate_items(100) - 1]
+            for expected, actual in zip(transformer.run_batch('test', mix, vocals, indices),
+                                        transformer.run_batch('test', precomputed_mix, precomputed_vocals, indices)):
+                assert np.array_equal(expected, actual)
+            for binary in [False, True]:
+                assert np.array_equal(transformer.mask_batch(mix, vocals, indices, binary),
+                                      transformer.mask_batch(precomputed_mix, precomputed_vocals, indices, binary))
+            magnitude = transformer.magnitude_batch(mix, indices).reshape((len(indices), 2 if stereo else 1, 769, 64))
+            assert np.allclose(transformer.phase_batch(mix, indices) * magnitude,
+                               transformer.phase_batch(precomputed_mix, indices) * magnitude, atol=1e-5)
+
+
+def test_mask_run_batch():
+    initialize()
+    for transformer in [MaskTransformer(64, 32, False, False), IBMMaskTransformer(64, 32, False, False)]:
+        for stereo in [False, True]:
+            transformer.stereo = stereo
+            mix = spectrogram(2 if stereo else 1)
+            vocals = spectrogram(2 if stereo else 1)
+            indices = [3, 0, 1, 2, transformer.calculate_items(100) - 1]
+            input, target = transformer.run_batch('test', mix, vocals, indices)
+            batch = np.zeros_like(input), np.zeros_like(target)
+            transformer.run_batch('test', mix, vocals, indices, batch[0], batch[1])
+            assert np.array_equal(batch[0], input) and np.array_equal(batch[1], target)
+            prepared = transformer.prepare_input_batch(mix, indices)
+            for i, index in enumerate(indices):
+                # Same as the previous single window implementation
+                mix_window = np.abs([transformer.chopper.chop_n_pad(channel, index, 64) for channel in mix])
+                vocals_window = np.abs([transformer.chopper.chop_n_pad(channel, index, 64) for channel in vocals])
+                if isinstance(transformer, IBMMaskTransformer):
+                    rest_window = np.abs([transformer.chopper.chop_n_pad(m - v, index, 64) for m, v in zip(mix, vocals)])
+                    expected = np.resize((rest_window <= vocals_window).astype(np.float32), (769, 32, 1))
+                else:
+                    expected = masker.mask(vocals_window, mix_window)[..., np.newaxis]
+                assert np.allclose(input[i], mix_window[..., np.newaxis])
+                assert np.allclose(target[i], expected)
+                assert np.allclose(prepared[i], mix_window[..., np.newaxis])
+
+
+if __name__ == "__main__":
+    test_run_into()
+    test_run_batch()
+    test_mask_run_batch()
+    test_precomputed_features()
+    print("Test run successful.")